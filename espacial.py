@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Autocorrelação espacial e suavização dos percentuais municipais.
+
+A vizinhança vem de um arquivo local indexado por CD_MUNICIPIO, em um de dois
+formatos (detectado pelas colunas):
+    adjacência: CD_MUNICIPIO;CD_VIZINHO          (um par por linha)
+    centróides: CD_MUNICIPIO;LATITUDE;LONGITUDE  (k vizinhos mais próximos)
+
+A matriz de vizinhança esparsa (CSR, padronizada por linha) é montada uma vez e
+guardada em cache (.npz ao lado do arquivo de origem).
+
+Calcula:
+    - I de Moran global e LISA (I local) de cada município, com pseudo p-valor
+      por permutação; as permutações são avaliadas em lote com produtos
+      matriz esparsa x matriz densa (global) e somas por linha sobre a
+      estrutura CSR (local, permutação condicional: k_i valores distintos
+      sorteados entre os outros n - 1 municípios);
+    - percentuais suavizados por Bayes empírico (global e espacial), com
+      num_eleitores como população, que reduzem o ruído de municípios pequenos.
+
+Uso:
+    python espacial.py <tabela_municipal.csv|.parquet> <vizinhanca.csv> [<saida.csv>]
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+K_VIZINHOS = 6
+PERMUTACOES = 999
+LOTE_PERMUTACOES = 100
+ALFA = 0.05
+
+# Variáveis analisadas: percentual -> (numerador, denominador) para o Bayes empírico
+VARIAVEIS = {
+    'perc_lula': ('votos_lula', 'total_validos_pres'),
+    'perc_votos_mulheres_total': ('votos_mulheres_total', 'num_eleitores'),
+}
+
+_VERSAO_CACHE = 1
+
+
+# ==============================================================================
+# MATRIZ DE VIZINHANÇA
+# ==============================================================================
+def _pesos_adjacencia(df):
+    pares = df[['CD_MUNICIPIO', 'CD_VIZINHO']].astype('int64')
+    # Vizinhança simétrica, sem laços
+    pares = pd.concat([pares, pares.rename(columns={'CD_MUNICIPIO': 'CD_VIZINHO',
+                                                    'CD_VIZINHO': 'CD_MUNICIPIO'})])
+    pares = pares[pares['CD_MUNICIPIO'] != pares['CD_VIZINHO']].drop_duplicates()
+    codigos = np.unique(pares.to_numpy())
+    lin = np.searchsorted(codigos, pares['CD_MUNICIPIO'].to_numpy())
+    col = np.searchsorted(codigos, pares['CD_VIZINHO'].to_numpy())
+    w = sparse.csr_matrix((np.ones(len(lin)), (lin, col)), shape=(len(codigos),) * 2)
+    return codigos, w
+
+
+def _pesos_knn(df, k):
+    from scipy.spatial import cKDTree
+
+    df = df.drop_duplicates('CD_MUNICIPIO').sort_values('CD_MUNICIPIO')
+    codigos = df['CD_MUNICIPIO'].to_numpy('int64')
+    lat = np.radians(df['LATITUDE'].to_numpy('float64'))
+    lon = np.radians(df['LONGITUDE'].to_numpy('float64'))
+    # Coordenadas na esfera unitária: distância euclidiana preserva a ordem da geodésica
+    xyz = np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+    k = min(k, len(codigos) - 1)
+    _, viz = cKDTree(xyz).query(xyz, k=k + 1)
+    lin = np.repeat(np.arange(len(codigos)), k)
+    col = viz[:, 1:].ravel()
+    w = sparse.csr_matrix((np.ones(len(lin)), (lin, col)), shape=(len(codigos),) * 2)
+    return codigos, w
+
+
+def padronizar_linhas(w):
+    soma = np.asarray(w.sum(axis=1)).ravel()
+    inv = np.divide(1.0, soma, out=np.zeros_like(soma), where=soma > 0)
+    return sparse.diags(inv) @ w
+
+
+def carregar_vizinhanca(arquivo, k=K_VIZINHOS):
+    """
+    Códigos dos municípios (ordenados) e matriz binária de vizinhança CSR.
+    Usa o cache .npz se ele for mais novo que o arquivo de origem.
+    """
+    cache = f"{os.path.splitext(arquivo)[0]}_vizinhanca_k{k}.npz"
+    if os.path.exists(cache) and os.path.getmtime(cache) >= os.path.getmtime(arquivo):
+        c = np.load(cache)
+        if int(c['versao']) == _VERSAO_CACHE:
+            w = sparse.csr_matrix((c['data'], c['indices'], c['indptr']), shape=tuple(c['shape']))
+            return c['codigos'], w
+
+    df = pd.read_csv(arquivo, sep=None, engine='python')
+    df.columns = [c.strip().upper() for c in df.columns]
+    if 'CD_VIZINHO' in df.columns:
+        codigos, w = _pesos_adjacencia(df)
+    elif {'LATITUDE', 'LONGITUDE'} <= set(df.columns):
+        codigos, w = _pesos_knn(df, k)
+    else:
+        raise KeyError("Arquivo de vizinhança precisa de CD_VIZINHO ou LATITUDE/LONGITUDE")
+
+    w = w.tocsr()
+    w.sort_indices()
+    np.savez(cache, versao=_VERSAO_CACHE, codigos=codigos, data=w.data,
+             indices=w.indices, indptr=w.indptr, shape=np.array(w.shape))
+    return codigos, w
+
+
+def alinhar(df, codigos, w):
+    """Recorta W para os municípios presentes em df, na ordem de df."""
+    pos = np.searchsorted(codigos, df['CD_MUNICIPIO'].to_numpy('int64'))
+    pos = np.minimum(pos, len(codigos) - 1)
+    presente = codigos[pos] == df['CD_MUNICIPIO'].to_numpy('int64')
+    pos = pos[presente]
+    return presente, w[pos][:, pos].tocsr()
+
+
+# ==============================================================================
+# MORAN GLOBAL E LOCAL
+# ==============================================================================
+def moran_global(x, w, permutacoes=PERMUTACOES, semente=0):
+    """
+    I de Moran com W padronizada por linha e pseudo p-valor unilateral: a
+    fração de permutações na cauda (superior ou inferior) em que o I observado
+    está, como no PySAL.
+    """
+    z = x - x.mean()
+    n = len(z)
+    s0 = w.sum()
+    denom = z @ z
+    i_obs = n / s0 * (z @ (w @ z)) / denom
+
+    rng = np.random.default_rng(semente)
+    i_perm = []
+    for inicio in range(0, permutacoes, LOTE_PERMUTACOES):
+        p = min(LOTE_PERMUTACOES, permutacoes - inicio)
+        zp = z[rng.random((n, p)).argsort(axis=0)]   # n x p, cada coluna uma permutação
+        i_perm.append(n / s0 * np.einsum('ij,ij->j', zp, w @ zp) / denom)
+    i_perm = np.concatenate(i_perm)
+
+    maiores = np.sum(i_perm >= i_obs)
+    extremos = min(maiores, permutacoes - maiores)
+    return {
+        'I': float(i_obs),
+        'E_I': -1.0 / (n - 1),
+        'p_valor': (extremos + 1.0) / (permutacoes + 1.0),
+        'z_perm': float((i_obs - i_perm.mean()) / i_perm.std()),
+    }
+
+
+def _sorteio_sem_reposicao(rng, n, forma):
+    """Inteiros em [0, n) sem repetição ao longo do último eixo de `forma`."""
+    sorteio = rng.integers(0, n, size=forma)
+    while True:
+        ordenado = np.sort(sorteio, axis=-1)
+        repetido = (ordenado[..., 1:] == ordenado[..., :-1]).any(axis=-1)
+        if not repetido.any():
+            return sorteio
+        # Com k << n as repetições são raras: ressorteia só essas amostras
+        sorteio[repetido] = rng.integers(0, n, size=(int(repetido.sum()), forma[-1]))
+
+
+def moran_local(x, w, permutacoes=PERMUTACOES, alfa=ALFA, semente=0):
+    """LISA (I local), pseudo p-valores por permutação condicional e quadrante."""
+    z = x - x.mean()
+    n = len(z)
+    m2 = (z @ z) / n
+    lag = w @ z
+    i_local = z * lag / m2
+
+    # Permutação condicional: o município i fica fixo e seus k_i vizinhos
+    # recebem k_i valores distintos sorteados entre os outros n - 1; os
+    # municípios são agrupados pelo número de vizinhos
+    grau = np.diff(w.indptr)
+    com_viz = grau > 0
+    grupos = [(linhas, w.data[w.indptr[linhas][:, None] + np.arange(k)])
+              for k in np.unique(grau[com_viz])
+              for linhas in [np.flatnonzero(grau == k)]]
+    rng = np.random.default_rng(semente)
+    maiores = np.zeros(n, dtype=np.int64)
+    for inicio in range(0, permutacoes, LOTE_PERMUTACOES):
+        p = min(LOTE_PERMUTACOES, permutacoes - inicio)
+        lag_perm = np.zeros((n, p))
+        for linhas, pesos in grupos:
+            sorteio = _sorteio_sem_reposicao(rng, n - 1, (len(linhas), p, pesos.shape[1]))
+            sorteio += sorteio >= linhas[:, None, None]
+            lag_perm[linhas] = np.einsum('mpk,mk->mp', z[sorteio], pesos)
+        i_perm = z[:, None] * lag_perm / m2
+        maiores += np.sum(i_perm >= i_local[:, None], axis=1)
+
+    extremos = np.minimum(maiores, permutacoes - maiores)
+    p_valor = (extremos + 1.0) / (permutacoes + 1.0)
+    p_valor = np.where(com_viz, p_valor, np.nan)
+
+    quadrante = np.select(
+        [(z > 0) & (lag > 0), (z < 0) & (lag < 0), (z > 0) & (lag < 0), (z < 0) & (lag > 0)],
+        ['AA', 'BB', 'AB', 'BA'], default='NS'
+    )
+    quadrante = np.where(p_valor <= alfa, quadrante, 'NS')
+    return i_local, p_valor, quadrante
+
+
+# ==============================================================================
+# BAYES EMPÍRICO
+# ==============================================================================
+def bayes_empirico(eventos, populacao, w=None):
+    """
+    Taxas suavizadas por Bayes empírico (estimador de momentos de Marshall).
+    Sem w: média/variância a priori globais. Com w (binária): a priori local,
+    calculada sobre o município e seus vizinhos.
+    """
+    eventos = np.asarray(eventos, dtype='float64')
+    populacao = np.asarray(populacao, dtype='float64')
+    taxa = np.divide(eventos, populacao, out=np.zeros_like(eventos), where=populacao > 0)
+
+    if w is None:
+        b = eventos.sum() / populacao.sum()
+        s2 = (populacao * (taxa - b) ** 2).sum() / populacao.sum()
+        a = s2 - b / populacao.mean()
+    else:
+        viz = (w != 0).astype('float64') + sparse.identity(w.shape[0], format='csr')
+        soma_pop = viz @ populacao
+        b = np.divide(viz @ eventos, soma_pop, out=np.zeros_like(soma_pop), where=soma_pop > 0)
+        n_viz = np.asarray(viz.sum(axis=1)).ravel()
+        # Σ_j n_j (r_j - b_i)^2 = Σ n_j r_j^2 - 2 b_i Σ n_j r_j + b_i^2 Σ n_j
+        s2 = (viz @ (populacao * taxa ** 2) - 2 * b * (viz @ (populacao * taxa))
+              + b ** 2 * soma_pop)
+        s2 = np.divide(s2, soma_pop, out=np.zeros_like(s2), where=soma_pop > 0)
+        a = s2 - np.divide(b, soma_pop / n_viz, out=np.zeros_like(b), where=soma_pop > 0)
+
+    a = np.maximum(a, 0.0)
+    peso = np.divide(a, a + np.divide(b, populacao, out=np.full_like(taxa, np.inf),
+                                      where=populacao > 0))
+    peso = np.nan_to_num(peso, nan=0.0)
+    return peso * taxa + (1 - peso) * b
+
+
+# ==============================================================================
+# ANÁLISE COMPLETA
+# ==============================================================================
+def analise_espacial(df, arquivo_vizinhanca, k=K_VIZINHOS, permutacoes=PERMUTACOES):
+    """
+    Acrescenta a df (uma linha por município, com as contagens brutas) as
+    colunas lisa_*, p_lisa_*, quadrante_*, *_eb e *_eb_espacial de cada
+    variável de VARIAVEIS. Municípios fora do arquivo de vizinhança (ex.: ZZ)
+    ficam com NaN. Retorna (df, resumo do Moran global).
+    """
+    codigos, w_bin = carregar_vizinhanca(arquivo_vizinhanca, k)
+    presente, w_bin = alinhar(df, codigos, w_bin)
+    w = padronizar_linhas(w_bin)
+
+    df = df.copy()
+    sub = df[presente]
+    resumo = []
+    for perc, (num, den) in VARIAVEIS.items():
+        if perc not in df.columns:
+            continue
+        x = sub[perc].to_numpy('float64')
+        g = moran_global(x, w, permutacoes)
+        resumo.append(dict(variavel=perc, n_municipios=len(x), **g))
+
+        i_local, p_valor, quadrante = moran_local(x, w, permutacoes)
+        df.loc[presente, f'lisa_{perc}'] = i_local
+        df.loc[presente, f'p_lisa_{perc}'] = p_valor
+        df.loc[presente, f'quadrante_{perc}'] = quadrante
+
+        if num in df.columns and den in df.columns:
+            eventos, pop = sub[num].to_numpy(), sub[den].to_numpy()
+            df.loc[presente, f'{perc}_eb'] = bayes_empirico(eventos, pop) * 100
+            df.loc[presente, f'{perc}_eb_espacial'] = bayes_empirico(eventos, pop, w_bin) * 100
+
+    return df, pd.DataFrame(resumo)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        print("Uso: python espacial.py <tabela_municipal.csv|.parquet> <vizinhanca.csv> [<saida.csv>]")
+        sys.exit(1)
+    entrada = sys.argv[1]
+    if entrada.endswith('.parquet') or os.path.isdir(entrada):
+        tabela = pd.read_parquet(entrada)
+    else:
+        tabela = pd.read_csv(entrada)
+    saida = sys.argv[3] if len(sys.argv) > 3 else 'analise_espacial_municipios.csv'
+
+    tabela, resumo = analise_espacial(tabela, sys.argv[2])
+    tabela.to_csv(saida, index=False)
+    print(resumo.to_string(index=False))
+    print(f"\nResultados por município salvos em {saida}")
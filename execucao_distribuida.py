@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Execução em shards (vários nós) com agregados parciais combináveis.
+
+O trabalho é dividido por (ano, UF, intervalo de bytes dentro do arquivo). Cada
+shard lê só o seu intervalo do votacao_secao_<ano>_<UF>.csv, filtra os cargos de
+interesse e grava, num diretório compartilhado, somas parciais por
+(ano, UF, município, turno, cargo, número) mais um sketch de momentos
+(n, soma, soma dos quadrados de QT_VOTOS por linha de seção).
+
+Os parciais são somas, então a redução é comutativa; cada shard tem um id
+determinístico e é gravado de forma atômica (arquivo temporário + os.replace,
+manifesto <id>.manifesto.json por último): reexecutar um shard concluído não
+faz nada e um shard interrompido é refeito do zero, sem parcial pela metade.
+O redutor combina qualquer conjunto de shards, ignorando duplicatas e avisando
+sobre intervalos de bytes não cobertos; shards de planos diferentes (outro
+--mb) cujos intervalos se sobrepõem contariam linhas duas vezes, e a redução
+é recusada.
+
+A tabela municipal final é a da tabela 'descritiva' do pipeline (mesmas
+funções de pipeline.py), por ano. Cada ano precisa do seu arquivo de candidatos
+(o gênero vem do índice, que é chaveado por ANO_ELEICAO); anos sem candidatos
+no índice fazem a redução falhar.
+
+Uso:
+    python execucao_distribuida.py planejar --dados ./data --plano plano.json [--mb 256]
+    python execucao_distribuida.py executar --plano plano.json --dir /compartilhado \\
+        (--shard 0 3 7 | --no 2 --nos 8 | --todos) [--processos 4] [--motor bytes] \\
+        [--progresso-intervalo 10] [--status-json status.json]
+    python execucao_distribuida.py reduzir --dir /compartilhado \\
+        --cand 2018=./data/consulta_cand_2018/consulta_cand_2018_BRASIL.csv \\
+               2022=./data/consulta_cand_2022/consulta_cand_2022_BRASIL.csv [--saida arquivo.csv]
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import multiprocessing
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from leitores import ler_csv, MOTORES, MOTOR_PADRAO
+from pipeline import (CHAVE_MUNICIPIO, carregar_config, montar_tabela_municipal,
+                      tabela_presidente)
+from progresso import Progresso, NotificadorFila, INTERVALO_PADRAO
+
+# (turno, cargo) mantidos: presidente 2º turno do arquivo BR e deputados
+# federal/estadual 1º turno dos arquivos por UF (que também trazem presidente)
+FILTROS_BR = [(2, 1)]
+FILTROS_UF = [(1, 6), (1, 7)]
+
+CHAVES = ['ANO_ELEICAO', 'SG_UF', 'CD_MUNICIPIO', 'NM_MUNICIPIO',
+          'NR_TURNO', 'CD_CARGO', 'NR_VOTAVEL']
+
+COLUNAS_LIDAS = ['ANO_ELEICAO', 'NR_TURNO', 'SG_UF', 'CD_MUNICIPIO', 'NM_MUNICIPIO',
+                 'CD_CARGO', 'NR_VOTAVEL', 'QT_VOTOS']
+
+TIPOS_LIDOS = {'ANO_ELEICAO': 'int16', 'NR_TURNO': 'int8', 'CD_CARGO': 'int8',
+               'CD_MUNICIPIO': 'int32', 'NR_VOTAVEL': 'int32', 'QT_VOTOS': 'int32'}
+
+BLOCO_LEITURA = 64 * 1024 * 1024
+
+_PADRAO_ARQUIVO = re.compile(r'votacao_secao_(\d{4})_([A-Z]{2})\.csv$')
+
+# Sufixo próprio: outros JSON no diretório compartilhado (ex.: --status-json)
+# não são confundidos com manifestos
+SUFIXO_MANIFESTO = '.manifesto.json'
+
+
+# ==============================================================================
+# PLANEJAMENTO
+# ==============================================================================
+def planejar_shards(arquivos, bytes_por_shard):
+    shards = []
+    for arq in sorted(arquivos):
+        m = _PADRAO_ARQUIVO.search(os.path.basename(arq))
+        if not m:
+            continue
+        ano, uf = int(m.group(1)), m.group(2)
+        tamanho = os.path.getsize(arq)
+        for inicio in range(0, max(tamanho, 1), bytes_por_shard):
+            fim = min(inicio + bytes_por_shard, tamanho)
+            shards.append({
+                'ano': ano, 'uf': uf,
+                'arquivo': os.path.abspath(arq),
+                'tamanho': tamanho,
+                'inicio': inicio, 'fim': fim,
+            })
+    for s in shards:
+        s['id'] = id_shard(s)
+    return shards
+
+
+def id_shard(shard):
+    base = f"{shard['ano']}|{shard['uf']}|{os.path.basename(shard['arquivo'])}|" \
+           f"{shard['tamanho']}|{shard['inicio']}|{shard['fim']}"
+    return f"{shard['ano']}_{shard['uf']}_{shard['inicio']:012d}_" \
+           + hashlib.sha1(base.encode()).hexdigest()[:10]
+
+
+# ==============================================================================
+# EXECUÇÃO DE UM SHARD
+# ==============================================================================
+def ler_blocos_intervalo(arquivo, inicio, fim, bloco=BLOCO_LEITURA):
+    """
+    Gera blocos de bytes (cabeçalho + linhas completas) com as linhas que
+    COMEÇAM dentro de [inicio, fim). A linha que atravessa `fim` pertence a
+    este shard; a que atravessa `inicio` pertence ao anterior.
+    """
+    with open(arquivo, 'rb') as f:
+        cabecalho = f.readline()
+        if inicio <= len(cabecalho) - 1:
+            pos = len(cabecalho)
+        else:
+            f.seek(inicio - 1)
+            f.readline()
+            pos = f.tell()
+        f.seek(pos)
+        while pos < fim:
+            dados = f.read(min(bloco, fim - pos))
+            if not dados:
+                break
+            if not dados.endswith(b'\n'):
+                dados += f.readline()
+            pos = f.tell()
+            yield cabecalho + dados
+
+
+def executar_shard(shard, diretorio, motor=MOTOR_PADRAO, ao_ler=None):
+    """
+    Processa um shard e grava o parcial + manifesto. Idempotente.
+
+    ao_ler: callable(bytes, linhas) de progresso (ver progresso.py); ao fim de
+    um shard processado a soma dos bytes relatados é fim - inicio. Shards já
+    concluídos não relatam nada.
+    """
+    ao_ler = ao_ler or (lambda bytes_, linhas: None)
+    intervalo = shard['fim'] - shard['inicio']
+    manifesto = caminho_manifesto(diretorio, shard['id'])
+    if os.path.exists(manifesto):
+        return shard['id'], 'existente'
+
+    ao_ler(0, 0)
+    filtros = FILTROS_BR if shard['uf'] == 'BR' else FILTROS_UF
+    parciais = []
+    enviados = 0
+    for dados in ler_blocos_intervalo(shard['arquivo'], shard['inicio'], shard['fim']):
+        lidos = list(ler_csv(dados, COLUNAS_LIDAS, TIPOS_LIDOS, motor=motor))
+        bytes_ = min(len(dados) - dados.index(b'\n') - 1, intervalo - enviados)
+        ao_ler(bytes_, sum(len(c) for c in lidos))
+        enviados += bytes_
+        if not lidos:
+            continue
+        chunk = pd.concat(lidos, ignore_index=True)
+        mascara = np.zeros(len(chunk), dtype=bool)
+        for turno, cargo in filtros:
+            mascara |= (chunk['NR_TURNO'] == turno).to_numpy() & (chunk['CD_CARGO'] == cargo).to_numpy()
+        chunk = chunk[mascara]
+        if len(chunk) == 0:
+            continue
+        qt = chunk['QT_VOTOS'].astype('int64')
+        chunk = chunk.assign(QT_VOTOS=qt, n_linhas=1, soma_quad=qt * qt)
+        parciais.append(chunk.groupby(CHAVES, as_index=False)[['QT_VOTOS', 'n_linhas', 'soma_quad']].sum())
+
+    if parciais:
+        parcial = pd.concat(parciais, ignore_index=True)
+        parcial = parcial.groupby(CHAVES, as_index=False)[['QT_VOTOS', 'n_linhas', 'soma_quad']].sum()
+    else:
+        parcial = pd.DataFrame(columns=CHAVES + ['QT_VOTOS', 'n_linhas', 'soma_quad'])
+    ao_ler(intervalo - enviados, 0)
+
+    os.makedirs(diretorio, exist_ok=True)
+    destino = os.path.join(diretorio, f"{shard['id']}.csv.gz")
+    # Nome temporário único entre nós (o PID pode se repetir em outra máquina)
+    tmp = f"{destino}.tmp.{uuid.uuid4().hex}"
+    parcial.to_csv(tmp, index=False, compression='gzip')
+    os.replace(tmp, destino)
+
+    # Manifesto por último: só shards com manifesto entram na redução
+    tmp = f"{manifesto}.tmp.{uuid.uuid4().hex}"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(dict(shard, linhas=int(len(parcial))), f, ensure_ascii=False)
+    os.replace(tmp, manifesto)
+    return shard['id'], 'ok'
+
+
+def caminho_manifesto(diretorio, sid):
+    return os.path.join(diretorio, f"{sid}{SUFIXO_MANIFESTO}")
+
+
+def tamanhos_por_uf(shards, diretorio):
+    """Bytes a ler por UF (soma dos intervalos dos shards sem manifesto)."""
+    tamanhos = {}
+    for s in shards:
+        if os.path.exists(caminho_manifesto(diretorio, s['id'])):
+            continue
+        tamanhos[s['uf']] = tamanhos.get(s['uf'], 0) + s['fim'] - s['inicio']
+    return tamanhos
+
+
+def executar_shards(shards, diretorio, processos=1, motor=MOTOR_PADRAO, progresso=None):
+    if processos <= 1:
+        for s in shards:
+            ao_ler = progresso.notificador(s['uf']) if progresso else None
+            sid, status = executar_shard(s, diretorio, motor, ao_ler)
+            print(f"   {sid}: {status}", flush=True)
+        if progresso:
+            progresso.fechar()
+        return
+    # Processos locais fazendo o papel dos nós; o progresso volta por uma fila
+    with multiprocessing.Manager() as gerenciador:
+        fila = progresso.iniciar_fila(gerenciador) if progresso else None
+        with ProcessPoolExecutor(max_workers=processos) as pool:
+            futuros = {pool.submit(executar_shard, s, diretorio, motor,
+                                   NotificadorFila(fila, s['uf']) if fila else None): s['id']
+                       for s in shards}
+            for fut in as_completed(futuros):
+                sid, status = fut.result()
+                print(f"   {sid}: {status}", flush=True)
+        if progresso:
+            progresso.fechar()
+
+
+# ==============================================================================
+# REDUÇÃO
+# ==============================================================================
+def carregar_parciais(diretorio):
+    manifestos = {}
+    for caminho in sorted(glob.glob(os.path.join(diretorio, f'*{SUFIXO_MANIFESTO}'))):
+        with open(caminho, encoding='utf-8') as f:
+            m = json.load(f)
+        manifestos[m['id']] = m  # ids repetidos contam uma vez só
+
+    partes = [pd.read_csv(os.path.join(diretorio, f"{sid}.csv.gz"),
+                          dtype={'NM_MUNICIPIO': 'string', 'SG_UF': 'string'})
+              for sid in sorted(manifestos)]
+    partes = [p for p in partes if len(p) > 0]
+    if partes:
+        total = pd.concat(partes, ignore_index=True)
+        total = total.groupby(CHAVES, as_index=False)[['QT_VOTOS', 'n_linhas', 'soma_quad']].sum()
+    else:
+        total = pd.DataFrame(columns=CHAVES + ['QT_VOTOS', 'n_linhas', 'soma_quad'])
+    return total, list(manifestos.values())
+
+
+def verificar_tamanhos(manifestos):
+    """Arquivos cujos shards foram planejados com tamanhos diferentes (CSV trocado)."""
+    tamanhos = {}
+    for m in manifestos:
+        tamanhos.setdefault(m['arquivo'], set()).add(m['tamanho'])
+    return {arq: sorted(t) for arq, t in tamanhos.items() if len(t) > 1}
+
+
+def verificar_cobertura(manifestos):
+    """Intervalos de bytes de cada arquivo ainda não cobertos por nenhum shard."""
+    por_arquivo = {}
+    for m in manifestos:
+        por_arquivo.setdefault(m['arquivo'], []).append((m['inicio'], m['fim'], m['tamanho']))
+    faltando = []
+    for arq, intervalos in por_arquivo.items():
+        tamanho = max(t for _, _, t in intervalos)
+        pos = 0
+        for inicio, fim, _ in sorted(intervalos):
+            if inicio > pos:
+                faltando.append((arq, pos, inicio))
+            pos = max(pos, fim)
+        if pos < tamanho:
+            faltando.append((arq, pos, tamanho))
+    return faltando
+
+
+def verificar_sobreposicao(manifestos):
+    """Pares de shards do mesmo arquivo com intervalos de bytes sobrepostos."""
+    por_arquivo = {}
+    for m in manifestos:
+        por_arquivo.setdefault(m['arquivo'], []).append(m)
+    sobrepostos = []
+    for arq, ms in por_arquivo.items():
+        ms = sorted(ms, key=lambda m: (m['inicio'], m['fim']))
+        anterior = ms[0]
+        for m in ms[1:]:
+            if m['inicio'] < anterior['fim']:
+                sobrepostos.append((arq, m['inicio'], min(m['fim'], anterior['fim']),
+                                    anterior['id'], m['id']))
+            if m['fim'] > anterior['fim']:
+                anterior = m
+    return sobrepostos
+
+
+def carregar_indices(especificacoes):
+    """
+    Índices de candidatos a partir de 'ANO=arquivo' (ou só 'arquivo', usado
+    para qualquer ano). Devolve {ano: índice}, com None para o padrão.
+    """
+    from indice_candidatos import carregar_indice
+
+    arquivos = {}
+    for esp in especificacoes:
+        ano, sep, arquivo = esp.partition('=')
+        if sep and not ano.isdigit():
+            raise ValueError(f"Ano inválido em --cand: {esp}")
+        arquivos[int(ano) if sep else None] = arquivo if sep else esp
+
+    # Arquivos de anos diferentes no mesmo diretório não podem dividir o índice
+    pastas = [os.path.dirname(os.path.abspath(a)) for a in arquivos.values()]
+    indices = {}
+    for ano, arquivo in arquivos.items():
+        pasta = os.path.dirname(os.path.abspath(arquivo))
+        diretorio = None
+        if pastas.count(pasta) > 1:
+            diretorio = os.path.join(pasta, f"indice_candidatos_{ano or 'padrao'}")
+        indices[ano] = carregar_indice(arquivo, diretorio)
+    return indices
+
+
+def _indice_do_ano(indices, ano):
+    indice = indices.get(int(ano), indices.get(None))
+    if indice is None:
+        raise ValueError(f"Sem arquivo de candidatos para {ano} (use --cand {ano}=arquivo)")
+    if not indice.selecionar(ano=int(ano)).any():
+        raise ValueError(f"Índice de candidatos sem entradas de {ano}: "
+                         f"{indice.meta['origem']}")
+    return indice
+
+
+def tabela_municipal(total, indices, tabela='descritiva'):
+    """
+    Tabela final por (ano, município) a partir das somas combinadas, com as
+    mesmas junções, percentuais e grupo Lula da tabela nomeada do pipeline.
+
+    indices: {ano: IndiceCandidatos} (chave None vale para qualquer ano).
+    """
+    config = carregar_config()
+    spec = config['tabelas'][tabela]
+    pres_cfg = config['presidente']
+    turno = config['turno_deputados']
+    chave_mun = ['ANO_ELEICAO'] + CHAVE_MUNICIPIO
+
+    pres = total[(total['NR_TURNO'] == pres_cfg['turno']) & (total['CD_CARGO'] == pres_cfg['cargo'])]
+    pres = tabela_presidente(pres, pres_cfg, chave_mun)
+
+    dep = total[(total['NR_TURNO'] == turno) & total['CD_CARGO'].isin(spec['cargos'])]
+    # Recorte de candidaturas com o índice do ano de cada linha
+    anos, cargos = dep['ANO_ELEICAO'].to_numpy(), dep['CD_CARGO'].to_numpy()
+    selecao = np.zeros(len(dep), dtype=np.int8)
+    for ano in np.unique(anos):
+        indice = _indice_do_ano(indices, ano)
+        for cargo in spec['cargos']:
+            sel = (anos == ano) & (cargos == cargo)
+            selecao[sel] = indice.pertence(
+                spec['candidatas']['atributo'], spec['candidatas']['valores'],
+                indice.localizar(ano, dep['SG_UF'].to_numpy()[sel], cargo, turno,
+                                 dep['NR_VOTAVEL'].to_numpy()[sel]))
+    return montar_tabela_municipal(pres, dep, selecao, spec, chave_mun)
+
+
+def momentos_municipais(total):
+    """Média e desvio padrão de QT_VOTOS por linha de seção, via soma e soma dos quadrados."""
+    chave = ['ANO_ELEICAO', 'SG_UF', 'CD_MUNICIPIO', 'NR_TURNO', 'CD_CARGO']
+    m = total.groupby(chave, as_index=False)[['QT_VOTOS', 'n_linhas', 'soma_quad']].sum()
+    n = m['n_linhas'].astype('float64')
+    m['media_votos_linha'] = m['QT_VOTOS'] / n
+    var = (m['soma_quad'] - n * m['media_votos_linha'] ** 2) / (n - 1)
+    m['dp_votos_linha'] = np.sqrt(var.clip(lower=0)).where(n > 1, 0.0)
+    return m
+
+
+def reduzir(diretorio, arquivos_cand, saida, estrito=False):
+    """arquivos_cand: lista de 'ANO=arquivo' (ou 'arquivo') de consulta_cand."""
+    from saidas import salvar_tabela
+
+    total, manifestos = carregar_parciais(diretorio)
+    print(f"   Shards combinados: {len(manifestos)}")
+
+    trocados = verificar_tamanhos(manifestos)
+    for arq, tamanhos in trocados.items():
+        print(f"   ERRO: {os.path.basename(arq)} aparece com tamanhos {tamanhos} "
+              "(plano feito antes de o arquivo ser substituído)")
+    if trocados:
+        print("   Shards de versões diferentes do mesmo arquivo; refaça os shards da versão antiga")
+        raise SystemExit(1)
+
+    sobrepostos = verificar_sobreposicao(manifestos)
+    for arq, ini, fim, id_a, id_b in sobrepostos:
+        print(f"   ERRO: {os.path.basename(arq)} bytes [{ini}, {fim}) em {id_a} e {id_b}")
+    if sobrepostos:
+        print("   Shards de planos diferentes no mesmo diretório; remova um dos planos")
+        raise SystemExit(1)
+
+    faltando = verificar_cobertura(manifestos)
+    for arq, ini, fim in faltando:
+        print(f"   AVISO: {os.path.basename(arq)} bytes [{ini}, {fim}) sem shard")
+    if faltando and estrito:
+        raise SystemExit(1)
+
+    tabela = tabela_municipal(total, carregar_indices(arquivos_cand))
+    os.makedirs(os.path.dirname(saida) or '.', exist_ok=True)
+    salvar_tabela(tabela, saida)
+    salvar_tabela(momentos_municipais(total),
+                  os.path.join(os.path.dirname(saida) or '.', 'momentos_municipais.csv'))
+    print(f"   Tabela municipal: {len(tabela)} linhas -> {saida}")
+    return tabela
+
+
+# ==============================================================================
+# LINHA DE COMANDO
+# ==============================================================================
+def main():
+    parser = argparse.ArgumentParser(description='Execução em shards com agregados combináveis')
+    sub = parser.add_subparsers(dest='comando', required=True)
+
+    p = sub.add_parser('planejar')
+    p.add_argument('--dados', required=True)
+    p.add_argument('--plano', required=True)
+    p.add_argument('--mb', type=int, default=256, help='tamanho de cada shard em MB')
+
+    p = sub.add_parser('executar')
+    p.add_argument('--plano', required=True)
+    p.add_argument('--dir', required=True)
+    grupo = p.add_mutually_exclusive_group(required=True)
+    grupo.add_argument('--shard', type=int, nargs='+', help='posições no plano')
+    grupo.add_argument('--no', type=int, help='nó atual (0..nos-1), pega shards i %% nos == no')
+    grupo.add_argument('--todos', action='store_true')
+    p.add_argument('--nos', type=int, default=1)
+    p.add_argument('--processos', type=int, default=1)
+    p.add_argument('--motor', choices=MOTORES, default=MOTOR_PADRAO)
+    p.add_argument('--progresso-intervalo', type=float, default=INTERVALO_PADRAO,
+                   help='segundos entre relatos de progresso')
+    p.add_argument('--status-json', help='arquivo JSON de status atualizado junto com o progresso')
+
+    p = sub.add_parser('reduzir')
+    p.add_argument('--dir', required=True)
+    p.add_argument('--cand', required=True, nargs='+',
+                   help='ANO=consulta_cand.csv para cada ano (ou um único arquivo)')
+    p.add_argument('--saida', default='analise_municipal_shards.csv')
+    p.add_argument('--estrito', action='store_true', help='falha se houver bytes sem shard')
+
+    args = parser.parse_args()
+
+    if args.comando == 'planejar':
+        arquivos = glob.glob(os.path.join(args.dados, 'votacao_secao_*_*.csv'))
+        shards = planejar_shards(arquivos, args.mb * 1024 * 1024)
+        with open(args.plano, 'w', encoding='utf-8') as f:
+            json.dump(shards, f, ensure_ascii=False, indent=1)
+        print(f"   {len(shards)} shards em {args.plano}")
+
+    elif args.comando == 'executar':
+        with open(args.plano, encoding='utf-8') as f:
+            shards = json.load(f)
+        if args.shard:
+            shards = [shards[i] for i in args.shard]
+        elif args.no is not None:
+            shards = [s for i, s in enumerate(shards) if i % args.nos == args.no]
+        os.makedirs(args.dir, exist_ok=True)
+        progresso = Progresso(tamanhos_por_uf(shards, args.dir), intervalo=args.progresso_intervalo,
+                              arquivo_status=args.status_json, nome='execucao_distribuida')
+        executar_shards(shards, args.dir, args.processos, args.motor, progresso)
+
+    else:
+        reduzir(args.dir, args.cand, args.saida, args.estrito)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Índice binário compacto de candidatos (consulta_cand).
+
+O CSV de candidatos é lido uma única vez e convertido em arrays NumPy salvos em
+disco (.npy), que depois são abertos com mmap_mode='r'. Assim os scripts de
+análise (e eventuais processos paralelos) compartilham a mesma cópia mapeada
+pelo sistema operacional, sem reprocessar nem serializar o CSV.
+
+Estrutura do diretório do índice:
+    chaves.npy        int64 ordenado, chave composta (ano, UF, cargo, turno, número)
+    atributos.npy     array estruturado com os atributos codificados por dicionário
+    dicionarios.json  tabelas código -> texto de cada atributo + metadados
+
+Cada arquivo é gravado num temporário e trocado com os.replace (metadados por
+último): processos que já mapearam o índice antigo continuam lendo a cópia
+antiga, em vez de ver o arquivo truncado durante uma reconstrução.
+
+Uso pela linha de comando:
+    python indice_candidatos.py <consulta_cand.csv> [<diretorio_indice>]
+"""
+
+import json
+import os
+import sys
+
+import numpy as np
+
+# ------------------------------------------------------------
+# Codificação da chave composta
+# ------------------------------------------------------------
+# chave = ano * 10^10 + uf * 10^8 + cargo * 10^6 + turno * 10^5 + número
+# (o número do candidato tem no máximo 5 dígitos - deputado estadual)
+UFS = ('AC', 'AL', 'AM', 'AP', 'BA', 'BR', 'CE', 'DF', 'ES', 'GO', 'MA',
+       'MG', 'MS', 'MT', 'PA', 'PB', 'PE', 'PI', 'PR', 'RJ', 'RN', 'RO',
+       'RR', 'RS', 'SC', 'SE', 'SP', 'TO', 'VT', 'ZZ')
+
+_UFS_ARR = np.array(UFS)
+
+# Atributos codificados por dicionário: nome no índice -> coluna no CSV
+ATRIBUTOS = {
+    'genero': 'DS_GENERO',
+    'raca': 'DS_COR_RACA',
+    'partido': 'SG_PARTIDO',
+    'coligacao': 'NM_COLIGACAO',
+    'situacao': 'DS_SIT_TOT_TURNO',
+    'nome': 'NM_URNA_CANDIDATO',
+}
+
+SITUACOES_ELEITO = ('ELEITO', 'ELEITO POR QP', 'ELEITO POR MÉDIA')
+
+COLUNAS_CHAVE = ['ANO_ELEICAO', 'SG_UF', 'CD_CARGO', 'NR_TURNO', 'NR_CANDIDATO']
+
+VERSAO_INDICE = 2
+
+
+def codificar_uf(ufs):
+    ufs = np.asarray(ufs).astype(str)
+    ufs = np.char.strip(ufs)
+    codigos = np.searchsorted(_UFS_ARR, ufs)
+    codigos = np.minimum(codigos, len(UFS) - 1)
+    invalidos = _UFS_ARR[codigos] != ufs
+    if invalidos.any():
+        desconhecidas = sorted(set(ufs[invalidos].tolist()))
+        raise ValueError(f"UF desconhecida: {desconhecidas}")
+    return codigos.astype(np.int64)
+
+
+def montar_chave(ano, uf, cargo, turno, numero):
+    ano = np.asarray(ano, dtype=np.int64)
+    cargo = np.asarray(cargo, dtype=np.int64)
+    turno = np.asarray(turno, dtype=np.int64)
+    numero = np.asarray(numero, dtype=np.int64)
+    return (ano * 10**10 + codificar_uf(uf) * 10**8 + cargo * 10**6
+            + turno * 10**5 + numero)
+
+
+# ------------------------------------------------------------
+# Construção
+# ------------------------------------------------------------
+def _codificar_coluna(serie):
+    valores = serie.fillna('').astype(str).str.strip()
+    categorias = sorted(valores.unique().tolist())
+    if len(categorias) <= 255:
+        tipo = np.uint8
+    elif len(categorias) <= 65535:
+        tipo = np.uint16
+    else:
+        tipo = np.uint32
+    codigos = valores.map({c: i for i, c in enumerate(categorias)}).to_numpy(tipo)
+    return codigos, categorias
+
+
+def construir_indice(arquivo_cand, diretorio):
+    import pandas as pd
+
+    colunas = COLUNAS_CHAVE + list(ATRIBUTOS.values())
+    df = pd.read_csv(
+        arquivo_cand,
+        sep=';',
+        encoding='latin1',
+        usecols=lambda c: c in colunas,
+        dtype={'ANO_ELEICAO': 'int16', 'CD_CARGO': 'int8',
+               'NR_TURNO': 'int8', 'NR_CANDIDATO': 'int32'}
+    )
+
+    for col in ATRIBUTOS.values():
+        if col not in df.columns:
+            df[col] = ''
+
+    chaves = montar_chave(df['ANO_ELEICAO'], df['SG_UF'], df['CD_CARGO'],
+                          df['NR_TURNO'], df['NR_CANDIDATO'])
+
+    # Candidaturas substituídas repetem a chave: mantém a última ocorrência,
+    # como o set_index(...).to_dict() usado anteriormente
+    ordem = np.argsort(chaves, kind='stable')
+    chaves = chaves[ordem]
+    ultima = np.append(chaves[1:] != chaves[:-1], True)
+    ordem = ordem[ultima]
+    chaves = chaves[ultima]
+    df = df.iloc[ordem].reset_index(drop=True)
+
+    dicionarios = {}
+    campos = []
+    codigos = {}
+    for nome, col in ATRIBUTOS.items():
+        codigos[nome], dicionarios[nome] = _codificar_coluna(df[col])
+        campos.append((nome, codigos[nome].dtype))
+
+    eleito = df['DS_SIT_TOT_TURNO'].fillna('').str.strip().isin(SITUACOES_ELEITO)
+    campos.append(('eleito', np.bool_))
+
+    atributos = np.empty(len(df), dtype=campos)
+    for nome in ATRIBUTOS:
+        atributos[nome] = codigos[nome]
+    atributos['eleito'] = eleito.to_numpy()
+
+    os.makedirs(diretorio, exist_ok=True)
+    _gravar_npy(os.path.join(diretorio, 'chaves.npy'), chaves)
+    _gravar_npy(os.path.join(diretorio, 'atributos.npy'), atributos)
+    meta = {
+        'versao': VERSAO_INDICE,
+        'origem': os.path.abspath(arquivo_cand),
+        'origem_mtime': os.path.getmtime(arquivo_cand),
+        'n_candidatos': int(len(chaves)),
+        'ufs': list(UFS),
+        'dicionarios': dicionarios,
+    }
+    destino = os.path.join(diretorio, 'dicionarios.json')
+    tmp = f"{destino}.tmp.{os.getpid()}"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(tmp, destino)
+
+    return IndiceCandidatos(diretorio)
+
+
+def _gravar_npy(destino, array):
+    # np.save num nome temporário (com .npy, senão o NumPy acrescenta a extensão)
+    tmp = f"{destino[:-4]}.tmp.{os.getpid()}.npy"
+    np.save(tmp, array)
+    os.replace(tmp, destino)
+
+
+# ------------------------------------------------------------
+# Leitura (memória mapeada)
+# ------------------------------------------------------------
+class IndiceCandidatos:
+
+    def __init__(self, diretorio):
+        self.diretorio = diretorio
+        with open(os.path.join(diretorio, 'dicionarios.json'), encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta.get('versao') != VERSAO_INDICE:
+            raise ValueError(f"Versão de índice incompatível em {diretorio}")
+        self.dicionarios = self.meta['dicionarios']
+        self.chaves = np.load(os.path.join(diretorio, 'chaves.npy'), mmap_mode='r')
+        self.atributos = np.load(os.path.join(diretorio, 'atributos.npy'), mmap_mode='r')
+        # Arquivos de reconstruções diferentes (leitura durante a troca)
+        if not len(self.chaves) == len(self.atributos) == self.meta['n_candidatos']:
+            raise ValueError(f"Índice inconsistente em {diretorio} (reconstrução em andamento?)")
+
+    def __len__(self):
+        return len(self.chaves)
+
+    def localizar(self, ano, uf, cargo, turno, numero):
+        """Posições no índice para cada chave (-1 quando não encontrada)."""
+        chave = montar_chave(ano, uf, cargo, turno, numero)
+        pos = np.searchsorted(self.chaves, chave)
+        pos = np.minimum(pos, len(self.chaves) - 1)
+        achou = np.asarray(self.chaves)[pos] == chave
+        return np.where(achou, pos, -1)
+
+    def atributo(self, nome, posicoes, padrao=-1):
+        """Códigos do atributo nas posições dadas (padrao onde posição = -1)."""
+        posicoes = np.asarray(posicoes)
+        valores = np.asarray(self.atributos[nome])[np.maximum(posicoes, 0)]
+        return np.where(posicoes >= 0, valores.astype(np.int32), padrao)
+
+    def codigo(self, nome, texto):
+        return self.dicionarios[nome].index(texto)
+
+    def decodificar(self, nome, codigos):
+        tabela = np.array(self.dicionarios[nome] + [''], dtype=object)
+        return tabela[np.asarray(codigos)]
+
+    def pertence(self, nome, valores, posicoes):
+        """
+        1 onde o atributo `nome` está entre `valores`, 0 nos demais e nos números
+        não encontrados. Para 'eleito' os valores são True/False; para os
+        atributos de ATRIBUTOS, textos (valores ausentes do dicionário são ignorados).
+        """
+        posicoes = np.asarray(posicoes)
+        if nome == 'eleito':
+            alvo = [bool(v) for v in valores]
+            return (np.isin(self.eleito(posicoes), alvo) & (posicoes >= 0)).astype(np.int8)
+        codigos = [self.codigo(nome, v) for v in valores if v in self.dicionarios[nome]]
+        return np.isin(self.atributo(nome, posicoes), codigos).astype(np.int8)
+
+    def eh_mulher(self, posicoes):
+        """1 para candidatas, 0 para candidatos ou números não encontrados."""
+        return self.pertence('genero', ['FEMININO'], posicoes)
+
+    def eleito(self, posicoes):
+        return self.atributo('eleito', posicoes, padrao=0).astype(bool)
+
+    def campos_chave(self, posicoes):
+        """Decompõe as chaves nas posições dadas em ano, UF, cargo, turno e número."""
+        chaves = np.asarray(self.chaves)[np.asarray(posicoes)]
+        ufs = np.array(self.meta['ufs'])
+        return {
+            'ANO_ELEICAO': chaves // 10**10,
+            'SG_UF': ufs[(chaves // 10**8) % 100],
+            'CD_CARGO': (chaves // 10**6) % 100,
+            'NR_TURNO': (chaves // 10**5) % 10,
+            'NR_CANDIDATO': chaves % 10**5,
+        }
+
+    def selecionar(self, ano=None, uf=None, cargo=None, turno=None):
+        """Máscara booleana sobre o índice a partir dos campos da chave."""
+        chaves = np.asarray(self.chaves)
+        mascara = np.ones(len(chaves), dtype=bool)
+        if ano is not None:
+            mascara &= chaves // 10**10 == ano
+        if uf is not None:
+            mascara &= (chaves // 10**8) % 100 == codificar_uf([uf])[0]
+        if cargo is not None:
+            mascara &= np.isin((chaves // 10**6) % 100, np.atleast_1d(cargo))
+        if turno is not None:
+            mascara &= (chaves // 10**5) % 10 == turno
+        return mascara
+
+
+def carregar_indice(arquivo_cand, diretorio=None):
+    """Abre o índice, reconstruindo-o se não existir ou se o CSV for mais novo."""
+    if diretorio is None:
+        diretorio = os.path.join(os.path.dirname(arquivo_cand), 'indice_candidatos')
+    meta_path = os.path.join(diretorio, 'dicionarios.json')
+    if os.path.exists(meta_path):
+        try:
+            indice = IndiceCandidatos(diretorio)
+            if (not os.path.exists(arquivo_cand)
+                    or indice.meta['origem_mtime'] >= os.path.getmtime(arquivo_cand)):
+                return indice
+        except (ValueError, KeyError, OSError):
+            pass
+    return construir_indice(arquivo_cand, diretorio)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Uso: python indice_candidatos.py <consulta_cand.csv> [<diretorio_indice>]")
+        sys.exit(1)
+    destino = sys.argv[2] if len(sys.argv) > 2 else None
+    if destino is None:
+        destino = os.path.join(os.path.dirname(sys.argv[1]), 'indice_candidatos')
+    idx = construir_indice(sys.argv[1], destino)
+    print(f"Índice salvo em {destino}: {len(idx):,} candidatos")
@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Leitura dos CSVs do TSE (';', latin1, campos entre aspas) com motores
+intercambiáveis. Todos devolvem DataFrames só com as colunas pedidas:
+
+    pandas   pd.read_csv com o motor C (comportamento original)
+    pyarrow  leitor CSV multithread do pyarrow, em streaming por blocos
+    bytes    varredura direta dos bytes com NumPy: acha os ';' e fins de
+             linha, converte os dígitos das colunas inteiras sem decodificar
+             texto e, nas colunas de texto, decodifica só os valores distintos.
+             Blocos fora do formato simples (';' ou quebra de linha entre
+             aspas, aspas escapadas, número de campos variável) são relidos
+             pelo pd.read_csv, com o mesmo resultado do motor pandas
+
+Uso típico:
+    for chunk in ler_csv(arquivo, colunas, tipos, motor='bytes'):
+        ...
+
+Comparação dos motores (tempo, MB/s, linhas/s e igualdade dos agregados):
+    python leitores.py <votacao_secao_2022_SP.csv> [pandas pyarrow bytes]
+"""
+
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+MOTORES = ('pandas', 'pyarrow', 'bytes')
+MOTOR_PADRAO = 'pandas'
+
+BLOCO_BYTES = 64 * 1024 * 1024
+LINHAS_POR_CHUNK = 500000
+
+_SEP = ord(';')
+_FIM = ord('\n')
+_CR = ord('\r')
+_ASPAS = ord('"')
+_MENOS = ord('-')
+_ZERO = ord('0')
+
+# Textos lidos como NaN: espelha o na_values padrão do pd.read_csv (ver
+# "na_values" na documentação do pandas), para o motor bytes dar o mesmo
+# resultado que o motor pandas
+VALORES_AUSENTES = [
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan',
+    '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None',
+    'n/a', 'nan', 'null',
+]
+
+
+# ==============================================================================
+# MOTOR PANDAS
+# ==============================================================================
+def _pandas(origem, colunas, tipos, linhas_por_chunk):
+    return pd.read_csv(origem, sep=';', encoding='latin1', usecols=colunas,
+                       dtype=tipos, chunksize=linhas_por_chunk)
+
+
+# ==============================================================================
+# MOTOR PYARROW
+# ==============================================================================
+def _pyarrow(origem, colunas, tipos, bloco):
+    import pyarrow as pa
+    from pyarrow import csv as pacsv
+
+    if isinstance(origem, (bytes, bytearray)):
+        origem = pa.BufferReader(origem)
+    leitor = pacsv.open_csv(
+        origem,
+        read_options=pacsv.ReadOptions(encoding='latin1', block_size=bloco, use_threads=True),
+        parse_options=pacsv.ParseOptions(delimiter=';'),
+        convert_options=pacsv.ConvertOptions(
+            include_columns=colunas,
+            column_types={c: pa.from_numpy_dtype(np.dtype(t)) for c, t in tipos.items()
+                          if c in colunas},
+        ),
+    )
+    for lote in leitor:
+        if lote.num_rows:
+            yield lote.to_pandas()
+
+
+# ==============================================================================
+# MOTOR BYTES
+# ==============================================================================
+# O formato esperado é o do TSE (';', campos entre aspas, sem ';', aspas ou
+# quebras de linha dentro dos valores). Um bloco fora desse formato é detectado
+# (linhas com número diferente de separadores, aspas dentro de um valor lido,
+# inteiro inválido) e lido inteiro pelo pandas, com o mesmo resultado.
+#
+# Depois de achar os separadores, cada campo curto (até 8 bytes com as aspas)
+# é lido com um único acesso de 8 bytes (uint64) que termina no fim do campo;
+# aspas, sinal e dígitos são tratados com aritmética sobre esses uint64.
+_U8 = np.uint64(8)
+_BYTE = np.uint64(0xFF)
+_ZEROS = np.uint64(0x3030303030303030)
+_NIBBLE_ALTO = np.uint64(0xF0F0F0F0F0F0F0F0)
+_SEIS = np.uint64(0x0606060606060606)
+# Por número de bytes k (0..8): deslocamento 8*(8-k) e máscara dos k bytes baixos
+_DESLOC = (8 * (8 - np.arange(9))).astype(np.uint64)
+_MASCARA_BAIXOS = np.array([(1 << 8 * k) - 1 for k in range(9)], dtype=np.uint64)
+
+
+def _delimitadores(buf, inicio_dados):
+    """
+    Posições dos ';' (matriz linhas x separadores) e dos fins de linha. Cada
+    linha precisa ter o mesmo número de ';', todos depois do fim da anterior.
+    """
+    # Busca no bloco todo e descarta o cabeçalho (evita somar o deslocamento
+    # a milhões de posições)
+    fins = np.flatnonzero(buf == _FIM)
+    fins = fins[np.searchsorted(fins, inicio_dados):]
+    if buf[-1] != _FIM:
+        fins = np.append(fins, len(buf))
+    seps = np.flatnonzero(buf == _SEP)
+    seps = seps[np.searchsorted(seps, inicio_dados):]
+    if len(fins) == 0 or len(seps) % len(fins):
+        raise ValueError("Número de campos por linha não é constante")
+    seps = seps.reshape(len(fins), -1)
+    if seps.shape[1] and (np.any(seps[:, -1] > fins) or np.any(seps[1:, 0] < fins[:-1])):
+        raise ValueError("Número de campos por linha não é constante")
+    return seps, fins
+
+
+def _campo(buf, seps, fins, inicio_dados, j):
+    """Início e fim (exclusivo) do campo j em cada linha, com aspas e sem \\r."""
+    ini = np.r_[inicio_dados, fins[:-1] + 1] if j == 0 else seps[:, j - 1] + 1
+    if j < seps.shape[1]:
+        return ini, np.ascontiguousarray(seps[:, j])
+    return ini, fins - (buf[np.maximum(fins - 1, 0)] == _CR)
+
+
+def _sem_aspas(buf, ini, fim):
+    aspas = (fim - ini >= 2) & (buf[np.minimum(ini, len(buf) - 1)] == _ASPAS) \
+        & (buf[np.maximum(fim - 1, 0)] == _ASPAS)
+    return ini + aspas, fim - aspas
+
+
+def _janelas(buf, fim):
+    """Os 8 bytes que terminam em `fim` (exclusivo), como uint64 little-endian."""
+    if len(buf) < 8:
+        buf = np.concatenate([buf, np.zeros(8 - len(buf), dtype=np.uint8)])
+    todas = np.ndarray((len(buf) - 7,), dtype='<u8', buffer=buf, strides=(1,))
+    inicio = fim - 8
+    janelas = todas[np.maximum(inicio, 0)]
+    curtas = inicio < 0  # campos no começo do bloco
+    if curtas.any():
+        janelas[curtas] <<= (_U8 * (-inicio[curtas]).astype(np.uint64))
+    return janelas
+
+
+def _conteudo_curto(buf, ini, fim):
+    """
+    Para campos de até 8 bytes: (janela com o conteúdo nos bytes altos, número
+    de bytes do conteúdo), já sem as aspas.
+    """
+    largura = fim - ini
+    janela = _janelas(buf, fim)
+    aspas = ((largura >= 2) & ((janela >> np.uint64(56)) == _ASPAS)
+             & (((janela >> _DESLOC[np.maximum(largura, 1)]) & _BYTE) == _ASPAS))
+    janela = np.where(aspas, janela << _U8, janela)
+    return janela, largura - 2 * aspas
+
+
+def _inteiros_largos(buf, ini, fim):
+    """Caminho geral (campos com mais de 8 bytes): dígitos agrupados pela largura."""
+    ini, fim = _sem_aspas(buf, ini, fim)
+    negativo = buf[np.minimum(ini, len(buf) - 1)] == _MENOS
+    largura = fim - ini - negativo
+    if largura.min() <= 0 or largura.max() > 18:
+        raise ValueError("Valor vazio ou não inteiro em coluna inteira")
+    valores = np.empty(len(ini), dtype=np.int64)
+    for w in np.unique(largura):
+        sel = np.flatnonzero(largura == w)
+        acc = np.zeros(len(sel), dtype=np.int64)
+        for k in range(w, 0, -1):
+            d = buf[fim[sel] - k] - np.uint8(_ZERO)  # uint8: bytes abaixo de '0' também dão > 9
+            if d.max() > 9:
+                raise ValueError("Valor não inteiro em coluna inteira")
+            acc = acc * 10 + d
+        valores[sel] = acc
+    return np.where(negativo, -valores, valores)
+
+
+def _inteiros(buf, ini, fim):
+    if len(ini) == 0:
+        return np.zeros(0, dtype=np.int64)
+    if (fim - ini).max() > 8:
+        return _inteiros_largos(buf, ini, fim)
+    janela, n = _conteudo_curto(buf, ini, fim)
+    if n.min() <= 0:
+        raise ValueError("Valor vazio em coluna inteira")
+    # Bytes antes do conteúdo viram '0' (zeros à esquerda); o sinal também
+    negativo = ((janela >> _DESLOC[n]) & _BYTE) == _MENOS
+    mascara = _MASCARA_BAIXOS[8 - n + negativo]
+    janela = (janela & ~mascara) | (_ZEROS & mascara)
+    # Todo byte em '0'..'9': nibble alto 3, e continua 3 somando 6
+    ruins = ((janela & _NIBBLE_ALTO) ^ _ZEROS) | (((janela + _SEIS) & _NIBBLE_ALTO) ^ _ZEROS)
+    if ruins.any() or np.any(negativo & (n == 1)):
+        raise ValueError("Valor não inteiro em coluna inteira")
+    # 8 dígitos (o mais significativo no byte baixo) -> inteiro, 2 a 2
+    d = janela - _ZEROS
+    d = (d * np.uint64(10) + (d >> np.uint64(8))) & np.uint64(0x00FF00FF00FF00FF)
+    d = (d * np.uint64(100) + (d >> np.uint64(16))) & np.uint64(0x0000FFFF0000FFFF)
+    d = (d * np.uint64(10000) + (d >> np.uint64(32))) & np.uint64(0xFFFFFFFF)
+    valores = d.astype(np.int64)
+    return np.where(negativo, -valores, valores)
+
+
+def _decodificar(unicos, inverso):
+    decodificados = np.array([u.decode('latin1') for u in unicos], dtype=object)
+    if any('"' in u for u in decodificados):
+        raise ValueError("Aspas dentro de um valor")
+    # Vazios e marcadores de ausência viram NaN, como no pd.read_csv
+    decodificados[np.isin(decodificados, VALORES_AUSENTES)] = np.nan
+    return decodificados[inverso.ravel()]
+
+
+def _textos(buf, ini, fim):
+    """Só os valores distintos são decodificados."""
+    if len(ini) and (fim - ini).max() <= 8:
+        # Valores curtos (UF, siglas): o próprio uint64 vai ao hash do pandas
+        janela, n = _conteudo_curto(buf, ini, fim)
+        codigo = np.where(n > 0, janela >> (_DESLOC[n] & np.uint64(63)), np.uint64(0))
+        inverso, unicos = pd.factorize(codigo)
+        return _decodificar(np.ascontiguousarray(unicos).view('S8'), inverso)
+
+    ini, fim = _sem_aspas(buf, ini, fim)
+    largura = fim - ini
+    w = max(int(largura.max()), 1) if len(largura) else 1
+    mat = buf[np.minimum(ini[:, None] + np.arange(w), len(buf) - 1)]
+    mat[np.arange(w) >= largura[:, None]] = 0
+    unicos, inverso = np.unique(mat.view(f'S{w}').ravel(), return_inverse=True)
+    return _decodificar(unicos, inverso)
+
+
+def _pandas_bloco(dados, cabecalho, colunas, tipos):
+    if bytes(dados[:len(cabecalho)]) != cabecalho:
+        dados = cabecalho + dados
+    df = pd.read_csv(io.BytesIO(dados), sep=';', encoding='latin1', usecols=colunas, dtype=tipos)
+    return df[colunas]
+
+
+def _bytes_bloco(dados, cabecalho, colunas, tipos):
+    buf = np.frombuffer(dados, dtype=np.uint8)
+    nomes = [c.strip().strip('"') for c in cabecalho.decode('latin1').rstrip('\r\n').split(';')]
+    inicio_dados = len(cabecalho) if bytes(dados[:len(cabecalho)]) == cabecalho else 0
+    if inicio_dados >= len(buf):
+        return pd.DataFrame({c: pd.Series(dtype=tipos.get(c, object)) for c in colunas})
+    try:
+        seps, fins = _delimitadores(buf, inicio_dados)
+        if seps.shape[1] != len(nomes) - 1:
+            raise ValueError("Número de campos diferente do cabeçalho")
+        saida = {}
+        for c in colunas:
+            ini, fim = _campo(buf, seps, fins, inicio_dados, nomes.index(c))
+            if c in tipos and np.issubdtype(np.dtype(tipos[c]), np.integer):
+                saida[c] = _inteiros(buf, ini, fim).astype(tipos[c])
+            else:
+                saida[c] = _textos(buf, ini, fim)
+                if c not in tipos and pd.isna(saida[c]).all():
+                    # Coluna toda vazia: o pandas infere float64
+                    saida[c] = saida[c].astype(np.float64)
+    except ValueError:
+        return _pandas_bloco(dados, cabecalho, colunas, tipos)
+    return pd.DataFrame(saida)
+
+
+def _blocos_arquivo(arquivo, bloco):
+    """Blocos terminados em fim de linha; a linha incompleta é relida no próximo (sem cópias)."""
+    if isinstance(arquivo, (str, os.PathLike)):
+        with open(arquivo, 'rb') as f:
+            yield from _blocos_arquivo(f, bloco)
+        return
+    cabecalho = arquivo.readline()
+    while True:
+        dados = arquivo.read(bloco)
+        if not dados:
+            break
+        corte = dados.rfind(b'\n') + 1
+        if corte == 0 or len(dados) < bloco:
+            if corte == 0 and len(dados) == bloco:
+                # Linha maior que o bloco: completa até o fim de linha
+                dados += arquivo.readline()
+            yield cabecalho, dados
+            continue
+        arquivo.seek(corte - len(dados), os.SEEK_CUR)
+        yield cabecalho, memoryview(dados)[:corte]
+
+
+def _bytes(origem, colunas, tipos, bloco):
+    if isinstance(origem, (bytes, bytearray)):
+        fim_cab = origem.index(b'\n') + 1
+        blocos = [(bytes(origem[:fim_cab]), origem)]
+    else:
+        blocos = _blocos_arquivo(origem, bloco)
+    for cabecalho, dados in blocos:
+        df = _bytes_bloco(dados, cabecalho, colunas, tipos)
+        if len(df):
+            yield df
+
+
+# ==============================================================================
+# INTERFACE
+# ==============================================================================
+def ler_csv(origem, colunas, tipos=None, motor=MOTOR_PADRAO,
+            linhas_por_chunk=LINHAS_POR_CHUNK, bloco=BLOCO_BYTES, ao_ler=None):
+    """
+    Itera sobre DataFrames com `colunas` de um CSV do TSE.
+
+    origem: caminho do arquivo ou bytes já em memória (com cabeçalho).
+    tipos: dtypes das colunas; as inteiras são convertidas direto dos bytes
+    no motor 'bytes', as demais viram texto.
+    ao_ler: callable(bytes, linhas) chamado após cada chunk com os bytes
+    consumidos da origem e as linhas lidas desde a chamada anterior; ao fim
+    a soma dos bytes é o tamanho da origem (ver progresso.py).
+    """
+    if motor not in MOTORES:
+        raise ValueError(f"Motor de leitura desconhecido: {motor} (opções: {', '.join(MOTORES)})")
+    tipos = dict(tipos or {})
+    if ao_ler is None:
+        return _abrir(origem, colunas, tipos, motor, linhas_por_chunk, bloco, None)
+    return _com_progresso(origem, colunas, tipos, motor, linhas_por_chunk, bloco, ao_ler)
+
+
+def _abrir(origem, colunas, tipos, motor, linhas_por_chunk, bloco, arquivo):
+    """Iterador de chunks; `arquivo` é um handle já aberto de `origem` (ou None)."""
+    fonte = origem if arquivo is None else arquivo
+    if motor == 'pandas':
+        if isinstance(fonte, (bytes, bytearray)):
+            fonte = io.BytesIO(fonte)
+        return _pandas(fonte, colunas, tipos, linhas_por_chunk)
+    if motor == 'pyarrow':
+        return _pyarrow(fonte, colunas, tipos, bloco)
+    return _bytes(fonte, colunas, tipos, bloco)
+
+
+def _bytes_por_linha(origem, amostra=1 << 20):
+    """Tamanho médio das linhas de dados nos primeiros `amostra` bytes."""
+    if isinstance(origem, (bytes, bytearray)):
+        trecho = bytes(origem[:amostra])
+    else:
+        with open(origem, 'rb') as f:
+            trecho = f.read(amostra)
+    inicio = trecho.find(b'\n') + 1
+    fim = trecho.rfind(b'\n') + 1
+    linhas = trecho.count(b'\n', inicio, fim)
+    return (fim - inicio) / linhas if linhas else float(len(trecho))
+
+
+def _com_progresso(origem, colunas, tipos, motor, linhas_por_chunk, bloco, ao_ler):
+    em_memoria = isinstance(origem, (bytes, bytearray))
+    tamanho = len(origem) if em_memoria else os.path.getsize(origem)
+    # pandas e bytes: a posição do arquivo acompanha o consumo (o motor bytes
+    # volta ao último fim de linha). O pyarrow lê adiantado (a posição chega ao
+    # fim já no primeiro lote) e a origem em memória não tem posição: nesses
+    # casos o avanço é estimado pelas linhas de cada chunk x tamanho médio de
+    # linha de uma amostra do início, sem passar de 99% antes do fim.
+    arquivo = None
+    por_linha = None
+    if em_memoria or motor == 'pyarrow':
+        por_linha = _bytes_por_linha(origem)
+    else:
+        arquivo = open(origem, 'rb')
+    limite = int(tamanho * 0.99)
+
+    lidos = 0
+    ao_ler(0, 0)  # marca o início da leitura desta origem
+    try:
+        for chunk in _abrir(origem, colunas, tipos, motor, linhas_por_chunk, bloco, arquivo):
+            if arquivo is not None:
+                pos = min(arquivo.tell(), tamanho)
+            else:
+                pos = min(lidos + int(len(chunk) * por_linha), limite)
+            ao_ler(max(pos - lidos, 0), len(chunk))
+            lidos = max(pos, lidos)
+            yield chunk
+    finally:
+        if arquivo is not None:
+            arquivo.close()
+    ao_ler(tamanho - lidos, 0)
+
+
+# ==============================================================================
+# BENCHMARK
+# ==============================================================================
+def _agregar_deputados(arquivo, motor):
+    colunas = ['NR_TURNO', 'CD_CARGO', 'SG_UF', 'CD_MUNICIPIO', 'NR_VOTAVEL', 'QT_VOTOS']
+    tipos = {'NR_TURNO': 'int8', 'CD_CARGO': 'int8', 'NR_VOTAVEL': 'int32',
+             'QT_VOTOS': 'int32', 'CD_MUNICIPIO': 'int32'}
+    partes = []
+    linhas = 0
+    for chunk in ler_csv(arquivo, colunas, tipos, motor=motor):
+        linhas += len(chunk)
+        chunk = chunk[(chunk['NR_TURNO'] == 1) & chunk['CD_CARGO'].isin([6, 7])]
+        partes.append(chunk.groupby(['SG_UF', 'CD_MUNICIPIO', 'CD_CARGO', 'NR_VOTAVEL'],
+                                    as_index=False)['QT_VOTOS'].sum())
+    agg = pd.concat(partes, ignore_index=True)
+    agg = agg.groupby(['SG_UF', 'CD_MUNICIPIO', 'CD_CARGO', 'NR_VOTAVEL'],
+                      as_index=False)['QT_VOTOS'].sum()
+    agg['SG_UF'] = agg['SG_UF'].astype(str)
+    return agg.sort_values(['SG_UF', 'CD_MUNICIPIO', 'CD_CARGO', 'NR_VOTAVEL'],
+                           ignore_index=True), linhas
+
+
+def benchmark(arquivo, motores=MOTORES):
+    tamanho_mb = os.path.getsize(arquivo) / 1024 ** 2
+    resultados = []
+    referencia = None
+    for motor in motores:
+        t0 = time.perf_counter()
+        agg, linhas = _agregar_deputados(arquivo, motor)
+        dt = time.perf_counter() - t0
+        if referencia is None:
+            referencia, igual = agg, True
+        else:
+            igual = agg.equals(referencia)
+        resultados.append({
+            'motor': motor, 'segundos': round(dt, 2),
+            'MB_s': round(tamanho_mb / dt, 1), 'linhas_s': int(linhas / dt),
+            'linhas': linhas, 'agregados_iguais': igual,
+        })
+    return pd.DataFrame(resultados)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Uso: python leitores.py <arquivo.csv> [motor ...]")
+        sys.exit(1)
+    motores = sys.argv[2:] or list(MOTORES)
+    print(f"Arquivo: {sys.argv[1]} ({os.path.getsize(sys.argv[1]) / 1024 ** 2:.1f} MB)")
+    print(benchmark(sys.argv[1], motores).to_string(index=False))
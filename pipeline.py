@@ -0,0 +1,593 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pipeline configurável com a leitura e a agregação de analise_descritiva_simples.py
+e v1/analise_municipal.py; os dois scripts são só pontos de entrada que chamam
+executar(carregar_config(...)) com a sua tabela ('descritiva' ou 'v1') e os
+relatórios dela. O redutor de execucao_distribuida.py monta a tabela municipal
+com as mesmas funções (tabela_presidente e montar_tabela_municipal).
+
+A configuração (JSON, mesclada recursivamente sobre CONFIG_PADRAO; listas como
+`relatorios` são substituídas inteiras) declara:
+    tabelas     tabelas municipais nomeadas: cargos de deputado, tipo de junção
+                com a presidencial, limiar/regra do grupo Lula, rótulos e o
+                recorte de candidaturas contado em votos_mulheres_* (padrão:
+                gênero FEMININO; pode ser raça, partido, coligação, situação
+                ou eleito). Cada tabela é mesclada sobre TABELA_PADRAO.
+    relatorios  saídas a produzir, cada uma apontando para uma tabela
+
+Exemplo (deputadas + tabela de votos em candidaturas pretas e pardas):
+    {"tabelas": {"negras": {"cargos": [6, 7],
+                            "candidatas": {"atributo": "raca",
+                                           "valores": ["PRETA", "PARDA"]}}},
+     "relatorios": [{"tipo": "tabela_municipal", "tabela": "negras",
+                     "arquivo": "negras.csv"}]}
+
+As colunas mantêm os nomes votos_mulheres_* / perc_votos_mulheres_* qualquer
+que seja o recorte (os relatórios dependem deles); use `renomear` em
+tabela_municipal para rotulá-las na saída.
+
+O planejador junta o que todos os relatórios pedem e lê cada arquivo uma única
+vez: o BR (presidente) e cada UF (todos os cargos de deputado de uma vez). As
+somas por (município, cargo, número), o recorte vindo do índice de candidatos e
+cada tabela municipal são calculados uma vez e reaproveitados por todos os
+relatórios. Com a configuração padrão, as saídas dos dois scripts custam uma
+passada pelos dados em vez de três.
+
+Uso:
+    python pipeline.py [config.json] [--motor bytes] [--saida DIR] [--plano]
+                       [--progresso-intervalo S] [--status-json ARQ]
+"""
+
+import argparse
+import copy
+import glob
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from indice_candidatos import carregar_indice, ATRIBUTOS
+from leitores import ler_csv, MOTORES
+from progresso import Progresso, INTERVALO_PADRAO
+from saidas import salvar_tabela
+
+SUFIXOS_CARGO = {6: 'fed', 7: 'est'}
+
+ESTADOS_GRANDES = ['SP', 'MG', 'BA', 'MA', 'RJ', 'RS', 'PR']
+
+TIPOS_VOTACAO = {'NR_TURNO': 'int8', 'CD_CARGO': 'int8', 'NR_VOTAVEL': 'int32',
+                 'QT_VOTOS': 'int32', 'CD_MUNICIPIO': 'int32'}
+
+JUNCOES = ('left', 'inner', 'outer', 'right')
+
+# Valores assumidos para as chaves omitidas em cada tabela (só 'cargos' é obrigatória)
+TABELA_PADRAO = {
+    'juncao': 'left',
+    'limiar': 50, 'acima_inclusivo': True, 'arredondar': None,
+    'rotulos': {'abaixo': 'abaixo', 'acima': 'acima'},
+    'candidatas': {'atributo': 'genero', 'valores': ['FEMININO']},
+}
+
+CONFIG_PADRAO = {
+    'ano': 2022,
+    'dados': './data',
+    'arquivo_cand': None,  # padrão: <dados>/consulta_cand_<ano>/consulta_cand_<ano>_BRASIL.csv
+    'motor': 'pandas',
+    'saida': '.',
+    'progresso': {'intervalo': INTERVALO_PADRAO, 'status_json': None},
+    'presidente': {'turno': 2, 'cargo': 1, 'nr_lula': 13, 'nr_adversario': 22},
+    'turno_deputados': 1,
+    'tabelas': {
+        # analise_descritiva_simples.py: federal + estadual, junção à esquerda,
+        # grupo "< 50" sobre o percentual arredondado
+        'descritiva': {
+            'cargos': [6, 7], 'juncao': 'left',
+            'limiar': 50, 'acima_inclusivo': True, 'arredondar': 2,
+            'rotulos': {'abaixo': 'menos_50_lula', 'acima': 'mais_50_lula'},
+        },
+        # v1/analise_municipal.py: só federal, junção interna, grupo "> 50"
+        'v1': {
+            'cargos': [6], 'juncao': 'inner',
+            'limiar': 50, 'acima_inclusivo': False, 'arredondar': None,
+            'rotulos': {'abaixo': 0, 'acima': 1},
+        },
+    },
+    'relatorios': [
+        {'tipo': 'grupos_csv', 'tabela': 'descritiva',
+         'arquivos': {'abaixo': 'municipios_menos_50_lula.csv',
+                      'acima': 'municipios_mais_50_lula.csv'}},
+        {'tipo': 'estatisticas_descritivas', 'tabela': 'descritiva',
+         'arquivo': 'estatisticas_descritivas.csv'},
+        {'tipo': 'top_candidatas', 'tabela': 'descritiva', 'n': 5, 'genero': 'FEMININO',
+         'arquivo': 'top_candidatas_por_municipio.csv'},
+        {'tipo': 'espacial', 'tabela': 'descritiva',
+         'vizinhanca': 'vizinhanca_municipios.csv', 'arquivo': 'analise_espacial_municipios.csv'},
+        {'tipo': 'tabela_municipal', 'tabela': 'v1', 'encoding': 'utf-8-sig',
+         'arquivo': 'analise_municipal_lula_deputadas_2022.csv',
+         'colunas': ['SG_UF', 'CD_MUNICIPIO', 'NM_MUNICIPIO', 'votos_lula', 'votos_bolsonaro',
+                     'votos_validos', 'perc_lula', 'grupo_lula', 'total_votos_dep',
+                     'votos_em_mulheres', 'perc_votos_mulheres'],
+         'renomear': {'total_validos_pres': 'votos_validos',
+                      'total_votos_dep_fed': 'total_votos_dep',
+                      'votos_mulheres_fed': 'votos_em_mulheres',
+                      'perc_votos_mulheres_fed': 'perc_votos_mulheres'}},
+        {'tipo': 'testes_grupos', 'tabela': 'v1', 'variavel': 'perc_votos_mulheres_fed',
+         'arquivos': {'resumo': 'resumo_estatistico.csv', 'testes': 'resultados_testes.csv'}},
+    ],
+}
+
+
+def _mesclar(base, extra):
+    """Mescla dicionários recursivamente; listas e demais valores de extra substituem os de base."""
+    for chave, valor in extra.items():
+        if isinstance(valor, dict) and isinstance(base.get(chave), dict):
+            _mesclar(base[chave], valor)
+        else:
+            base[chave] = copy.deepcopy(valor)
+    return base
+
+
+def carregar_config(caminho=None, extra=None):
+    """CONFIG_PADRAO + JSON em `caminho` + dicionário `extra` (nessa ordem)."""
+    config = copy.deepcopy(CONFIG_PADRAO)
+    if caminho:
+        with open(caminho, encoding='utf-8') as f:
+            _mesclar(config, json.load(f))
+    if extra:
+        _mesclar(config, extra)
+    config['tabelas'] = {nome: _mesclar(copy.deepcopy(TABELA_PADRAO), spec)
+                         for nome, spec in config['tabelas'].items()}
+    if not config['arquivo_cand']:
+        ano = config['ano']
+        config['arquivo_cand'] = os.path.join(
+            config['dados'], f'consulta_cand_{ano}', f'consulta_cand_{ano}_BRASIL.csv')
+    validar_config(config)
+    return config
+
+
+def validar_config(config):
+    """Erros de configuração antes de qualquer leitura (ValueError com a chave culpada)."""
+    for nome, spec in config['tabelas'].items():
+        if not spec.get('cargos'):
+            raise ValueError(f"Tabela '{nome}': 'cargos' é obrigatório")
+        if spec.get('juncao', 'left') not in JUNCOES:
+            raise ValueError(f"Tabela '{nome}': juncao '{spec['juncao']}' inválida "
+                             f"(opções: {', '.join(JUNCOES)})")
+        rotulos = spec.get('rotulos', {})
+        if 'abaixo' not in rotulos or 'acima' not in rotulos:
+            raise ValueError(f"Tabela '{nome}': 'rotulos' precisa de 'abaixo' e 'acima'")
+        atributo = spec.get('candidatas', TABELA_PADRAO['candidatas']).get('atributo')
+        if atributo not in ATRIBUTOS and atributo != 'eleito':
+            raise ValueError(f"Tabela '{nome}': atributo de candidatas '{atributo}' desconhecido "
+                             f"(opções: {', '.join(list(ATRIBUTOS) + ['eleito'])})")
+    for i, rel in enumerate(config['relatorios'], 1):
+        if rel.get('tipo') not in RELATORIOS:
+            raise ValueError(f"Relatório {i}: tipo desconhecido {rel.get('tipo')} "
+                             f"(opções: {', '.join(RELATORIOS)})")
+        if rel.get('tabela') not in config['tabelas']:
+            raise ValueError(f"Relatório {i} ({rel['tipo']}): tabela '{rel.get('tabela')}' "
+                             f"não definida (tabelas: {', '.join(config['tabelas'])})")
+
+
+# ==============================================================================
+# PLANEJAMENTO
+# ==============================================================================
+def planejar(config):
+    """Leituras necessárias para atender todos os relatórios."""
+    tabelas_usadas = {r['tabela'] for r in config['relatorios'] if 'tabela' in r}
+    cargos = set()
+    for nome in tabelas_usadas:
+        cargos.update(config['tabelas'][nome]['cargos'])
+    for r in config['relatorios']:
+        cargos.update(r.get('cargos', []))
+
+    ano = config['ano']
+    arquivos_uf = sorted(glob.glob(os.path.join(config['dados'], f'votacao_secao_{ano}_*.csv')))
+    arquivos_uf = [f for f in arquivos_uf if not f.endswith('_BR.csv')]
+    return {
+        'presidente': os.path.join(config['dados'], f'votacao_secao_{ano}_BR.csv'),
+        'arquivos_uf': arquivos_uf if cargos else [],
+        'cargos_deputados': sorted(cargos),
+        'tabelas': sorted(tabelas_usadas),
+    }
+
+
+# ==============================================================================
+# TABELA MUNICIPAL (também usada pelo redutor de execucao_distribuida.py)
+# ==============================================================================
+CHAVE_MUNICIPIO = ['SG_UF', 'CD_MUNICIPIO']
+
+
+def tabela_presidente(votos, pres_cfg, chave=CHAVE_MUNICIPIO):
+    """
+    Votos em Lula e no adversário por município.
+
+    votos: somas por chave + NM_MUNICIPIO + NR_VOTAVEL (QT_VOTOS), já filtradas
+    no turno/cargo presidencial.
+    """
+    indice = list(chave) + ['NM_MUNICIPIO']
+    pivot = votos.pivot_table(index=indice, columns='NR_VOTAVEL', values='QT_VOTOS',
+                              aggfunc='sum', fill_value=0).reset_index()
+    pivot.columns.name = None
+    for nr, col in [(pres_cfg['nr_lula'], 'votos_lula'),
+                    (pres_cfg['nr_adversario'], 'votos_bolsonaro')]:
+        pivot[col] = pivot[nr] if nr in pivot.columns else 0
+    pivot = pivot[indice + ['votos_lula', 'votos_bolsonaro']]
+    pivot['total_validos_pres'] = pivot['votos_lula'] + pivot['votos_bolsonaro']
+    pivot['perc_lula'] = pivot['votos_lula'] / pivot['total_validos_pres'] * 100
+    return pivot
+
+
+def montar_tabela_municipal(pres, dep, selecao, spec, chave=CHAVE_MUNICIPIO):
+    """
+    Junta a tabela presidencial às somas de deputados e calcula os percentuais
+    e o grupo Lula de uma tabela nomeada.
+
+    dep: somas por chave + CD_CARGO (+ NR_VOTAVEL) em QT_VOTOS.
+    selecao: 0/1 alinhado a dep (a candidatura está no recorte da tabela).
+    """
+    chave = list(chave)
+    tabela = pres.copy()
+    dep = dep.assign(votos_mulheres=dep['QT_VOTOS'] * selecao)
+
+    votos_cargos = []
+    for cargo in spec['cargos']:
+        suf = SUFIXOS_CARGO.get(cargo, str(cargo))
+        d = dep[dep['CD_CARGO'] == cargo]
+        agg = d.groupby(chave, as_index=False)[['QT_VOTOS', 'votos_mulheres']].sum()
+        agg = agg.rename(columns={'QT_VOTOS': f'total_votos_dep_{suf}',
+                                  'votos_mulheres': f'votos_mulheres_{suf}'})
+        votos_cargos.append(agg)
+
+    votos = votos_cargos[0]
+    for agg in votos_cargos[1:]:
+        votos = votos.merge(agg, on=chave, how='outer')
+    tabela = tabela.merge(votos, on=chave, how=spec['juncao'])
+
+    totais, mulheres, colunas_dep = [], [], []
+    for cargo in spec['cargos']:
+        suf = SUFIXOS_CARGO.get(cargo, str(cargo))
+        tot, mul, perc = f'total_votos_dep_{suf}', f'votos_mulheres_{suf}', f'perc_votos_mulheres_{suf}'
+        tabela[tot] = tabela[tot].fillna(0)
+        tabela[mul] = tabela[mul].fillna(0)
+        tabela[perc] = np.where(
+            tabela[tot] > 0, tabela[mul] / tabela[tot].where(tabela[tot] > 0) * 100, 0.0)
+        totais.append(tot)
+        mulheres.append(mul)
+        colunas_dep += [tot, mul, perc]
+    # Colunas de cada cargo juntas (total, votos no recorte, percentual)
+    tabela = tabela[[c for c in tabela.columns if c not in colunas_dep] + colunas_dep]
+
+    tabela['num_eleitores'] = tabela[totais].sum(axis=1)
+    tabela['votos_mulheres_total'] = tabela[mulheres].sum(axis=1)
+    tabela['perc_votos_mulheres_total'] = np.where(
+        tabela['num_eleitores'] > 0,
+        tabela['votos_mulheres_total'] / tabela['num_eleitores'].where(tabela['num_eleitores'] > 0) * 100,
+        0.0)
+
+    perc = tabela['perc_lula']
+    if spec.get('arredondar') is not None:
+        perc = perc.round(spec['arredondar'])
+    if spec.get('acima_inclusivo', True):
+        acima = ~(perc < spec['limiar'])
+    else:
+        acima = perc > spec['limiar']
+    tabela['grupo_lula'] = np.where(acima, spec['rotulos']['acima'], spec['rotulos']['abaixo'])
+    return tabela
+
+
+# ==============================================================================
+# INTERMEDIÁRIOS COMPARTILHADOS
+# ==============================================================================
+class Contexto:
+    """Guarda cada leitura/agregado na primeira vez em que é pedido."""
+
+    def __init__(self, config, plano):
+        self.config = config
+        self.plano = plano
+        self._cache = {}
+
+    def _memo(self, chave, funcao):
+        if chave not in self._cache:
+            self._cache[chave] = funcao()
+        return self._cache[chave]
+
+    @property
+    def indice(self):
+        return self._memo('indice', lambda: carregar_indice(self.config['arquivo_cand']))
+
+    def presidente(self):
+        return self._memo('presidente', self._ler_presidente)
+
+    def deputados(self):
+        return self._memo('deputados', self._ler_deputados)
+
+    def tabela(self, nome):
+        return self._memo(('tabela', nome), lambda: self._montar_tabela(self.config['tabelas'][nome]))
+
+    @property
+    def progresso(self):
+        return self._memo('progresso', self._criar_progresso)
+
+    def _criar_progresso(self):
+        arquivos = {'BR': self.plano['presidente']}
+        for arq in self.plano['arquivos_uf']:
+            arquivos[os.path.basename(arq).split('_')[-1].replace('.csv', '')] = arq
+        cfg = dict(CONFIG_PADRAO['progresso'], **self.config['progresso'])
+        return Progresso({r: os.path.getsize(a) for r, a in arquivos.items()},
+                         intervalo=cfg['intervalo'], arquivo_status=cfg['status_json'],
+                         nome='pipeline')
+
+    def _ler_presidente(self):
+        pres_cfg = self.config['presidente']
+        print(f"\n   Lendo {self.plano['presidente']} (presidente, {pres_cfg['turno']}º turno)...")
+        partes = []
+        for chunk in ler_csv(self.plano['presidente'],
+                             ['NR_TURNO', 'CD_CARGO', 'SG_UF', 'CD_MUNICIPIO', 'NM_MUNICIPIO',
+                              'NR_VOTAVEL', 'QT_VOTOS'],
+                             TIPOS_VOTACAO, motor=self.config['motor'], linhas_por_chunk=500000,
+                             ao_ler=self.progresso.notificador('BR')):
+            chunk = chunk[(chunk['NR_TURNO'] == pres_cfg['turno'])
+                          & (chunk['CD_CARGO'] == pres_cfg['cargo'])]
+            partes.append(chunk.groupby(['SG_UF', 'CD_MUNICIPIO', 'NM_MUNICIPIO', 'NR_VOTAVEL'],
+                                        as_index=False)['QT_VOTOS'].sum())
+        self.progresso.concluir('BR')
+        print(f"   {self.progresso.resumo('BR')}")
+        pivot = tabela_presidente(pd.concat(partes, ignore_index=True), pres_cfg)
+        print(f"   Municípios (presidente): {len(pivot)}")
+        return pivot
+
+    def _ler_deputados(self):
+        """Uma leitura por UF com todos os cargos pedidos; posição de cada número no índice."""
+        cargos = self.plano['cargos_deputados']
+        turno = self.config['turno_deputados']
+        chaves = ['SG_UF', 'CD_MUNICIPIO', 'CD_CARGO', 'NR_VOTAVEL']
+        print(f"\n   Lendo arquivos por UF (cargos {cargos}, {turno}º turno)...")
+        por_uf = []
+        for arq in self.plano['arquivos_uf']:
+            uf = os.path.basename(arq).split('_')[-1].replace('.csv', '')
+            print(f"   Processando {uf}...", flush=True)
+            partes = []
+            for chunk in ler_csv(arq, ['NR_TURNO', 'CD_CARGO', 'SG_UF', 'CD_MUNICIPIO',
+                                       'NR_VOTAVEL', 'QT_VOTOS'],
+                                 TIPOS_VOTACAO, motor=self.config['motor'],
+                                 linhas_por_chunk=300000 if uf in ESTADOS_GRANDES else 500000,
+                                 ao_ler=self.progresso.notificador(uf)):
+                chunk = chunk[(chunk['NR_TURNO'] == turno) & chunk['CD_CARGO'].isin(cargos)]
+                partes.append(chunk.groupby(chaves, as_index=False)['QT_VOTOS'].sum())
+            if partes:
+                agg = pd.concat(partes, ignore_index=True)
+                agg = agg.groupby(chaves, as_index=False)['QT_VOTOS'].sum()
+                por_uf.append(agg)
+            self.progresso.concluir(uf)
+            print(f"      {len(agg) if partes else 0} registros ({self.progresso.resumo(uf)})")
+
+        if not por_uf:
+            return pd.DataFrame(columns=chaves + ['QT_VOTOS', 'pos_indice'])
+        dep = pd.concat(por_uf, ignore_index=True)
+        dep['pos_indice'] = -1
+        for cargo in cargos:
+            sel = (dep['CD_CARGO'] == cargo).to_numpy()
+            dep.loc[sel, 'pos_indice'] = self.indice.localizar(
+                self.config['ano'], dep.loc[sel, 'SG_UF'], cargo, turno,
+                dep.loc[sel, 'NR_VOTAVEL'])
+        return dep
+
+    def selecao(self, candidatas):
+        """0/1 por linha de deputados(): a candidatura está no recorte da tabela?"""
+        chave = ('selecao', candidatas['atributo'], tuple(candidatas['valores']))
+        return self._memo(chave, lambda: self.indice.pertence(
+            candidatas['atributo'], candidatas['valores'], self.deputados()['pos_indice'].to_numpy(np.int64)))
+
+    def _montar_tabela(self, spec):
+        selecao = self.selecao(spec.get('candidatas', TABELA_PADRAO['candidatas']))
+        return montar_tabela_municipal(self.presidente(), self.deputados(), selecao, spec)
+
+    def grupos(self, nome):
+        """(tabela abaixo do limiar, tabela acima do limiar) de uma tabela nomeada."""
+        tabela = self.tabela(nome)
+        rotulos = self.config['tabelas'][nome]['rotulos']
+        return (tabela[tabela['grupo_lula'] == rotulos['abaixo']],
+                tabela[tabela['grupo_lula'] == rotulos['acima']])
+
+
+# ==============================================================================
+# RELATÓRIOS
+# ==============================================================================
+def _caminho(config, arquivo):
+    return os.path.join(config['saida'], arquivo)
+
+
+COLUNAS_GRUPOS = ['SG_UF', 'NM_MUNICIPIO', 'num_eleitores', 'perc_lula',
+                  'perc_votos_mulheres_fed', 'perc_votos_mulheres_est', 'perc_votos_mulheres_total']
+
+
+def relatorio_grupos_csv(ctx, rel):
+    """Um CSV por grupo, ordenado pelo percentual total de votos em mulheres."""
+    abaixo, acima = ctx.grupos(rel['tabela'])
+    colunas = [c for c in rel.get('colunas', COLUNAS_GRUPOS) if c in abaixo.columns]
+    saidas = {}
+    for lado, df in (('abaixo', abaixo), ('acima', acima)):
+        # Ordena pelo valor arredondado do CSV, como o script original
+        df = df.sort_values('perc_votos_mulheres_total', ascending=False,
+                            key=lambda s: s.round(2)).drop(columns=['grupo_lula'])
+        saidas[lado], _ = salvar_tabela(df, _caminho(ctx.config, rel['arquivos'][lado]), colunas)
+        print(f"   {rel['arquivos'][lado]}: {len(df)} municípios")
+    ctx._cache[('grupos_csv', rel['tabela'])] = saidas
+    return saidas
+
+
+def _estatisticas(df, nome):
+    col = 'perc_votos_mulheres_total'
+    moda = df[col].mode()
+    est = {'grupo': nome, 'n_municipios': len(df)}
+    for suf in ('fed', 'est', 'total'):
+        c = f'perc_votos_mulheres_{suf}'
+        if c in df.columns:
+            est[f'media_perc_mulheres_{suf}'] = df[c].mean().round(2)
+            est[f'mediana_perc_mulheres_{suf}'] = df[c].median().round(2)
+    est['moda_perc_mulheres_total'] = moda.values[0] if len(moda) > 0 else np.nan
+    est['desvio_padrao_total'] = df[col].std().round(2)
+    return est
+
+
+def relatorio_estatisticas_descritivas(ctx, rel):
+    """Média/mediana/moda/desvio por grupo, sobre os valores já arredondados dos CSVs."""
+    saidas = ctx._cache.get(('grupos_csv', rel['tabela']))
+    if saidas is None:
+        abaixo, acima = ctx.grupos(rel['tabela'])
+        casas = rel.get('casas', 2)
+        saidas = {'abaixo': abaixo.round({c: casas for c in COLUNAS_GRUPOS if c.startswith('perc_')}),
+                  'acima': acima.round({c: casas for c in COLUNAS_GRUPOS if c.startswith('perc_')})}
+    limiar = ctx.config['tabelas'][rel['tabela']]['limiar']
+    df = pd.DataFrame([_estatisticas(saidas['abaixo'], f'Menos_{limiar}%_Lula'),
+                       _estatisticas(saidas['acima'], f'Mais_{limiar}%_Lula')])
+    df.to_csv(_caminho(ctx.config, rel['arquivo']), index=False)
+    print("\n" + df.to_string(index=False))
+    return df
+
+
+def relatorio_tabela_municipal(ctx, rel):
+    tabela = ctx.tabela(rel['tabela']).rename(columns=rel.get('renomear', {}))
+    colunas = [c for c in rel.get('colunas', tabela.columns) if c in tabela.columns]
+    salvar_tabela(tabela[colunas], _caminho(ctx.config, rel['arquivo']), casas=None,
+                  encoding=rel.get('encoding'))
+    print(f"   {rel['arquivo']}: {len(tabela)} municípios")
+    return tabela
+
+
+def relatorio_testes_grupos(ctx, rel):
+    """Teste t, Mann-Whitney e d de Cohen entre os grupos (acima x abaixo)."""
+    from scipy import stats
+
+    abaixo, acima = ctx.grupos(rel['tabela'])
+    g_acima, g_abaixo = acima[rel['variavel']], abaixo[rel['variavel']]
+    limiar = ctx.config['tabelas'][rel['tabela']]['limiar']
+
+    t_stat, p_t = stats.ttest_ind(g_acima, g_abaixo)
+    u_stat, p_u = stats.mannwhitneyu(g_acima, g_abaixo, alternative='two-sided')
+    pooled = np.sqrt((g_acima.std() ** 2 + g_abaixo.std() ** 2) / 2)
+    cohens_d = (g_acima.mean() - g_abaixo.mean()) / pooled if pooled > 0 else 0.0
+
+    resumo = pd.DataFrame({
+        'Grupo': [f'Municípios Lula >{limiar}%', f'Municípios Lula <={limiar}%'],
+        'N': [len(g_acima), len(g_abaixo)],
+        'Média': [g_acima.mean(), g_abaixo.mean()],
+        'Mediana': [g_acima.median(), g_abaixo.median()],
+        'Desvio_Padrão': [g_acima.std(), g_abaixo.std()],
+        'Mínimo': [g_acima.min(), g_abaixo.min()],
+        'Máximo': [g_acima.max(), g_abaixo.max()],
+    })
+    testes = pd.DataFrame({
+        'Teste': ['Teste t de Student', 'Mann-Whitney U', 'Cohen\'s d'],
+        'Estatística': [t_stat, u_stat, cohens_d],
+        'P-valor': [p_t, p_u, np.nan],
+    })
+    resumo.to_csv(_caminho(ctx.config, rel['arquivos']['resumo']), index=False, encoding='utf-8-sig')
+    testes.to_csv(_caminho(ctx.config, rel['arquivos']['testes']), index=False, encoding='utf-8-sig')
+    print("\n" + testes.to_string(index=False))
+    return resumo, testes
+
+
+def relatorio_top_candidatas(ctx, rel):
+    from top_candidatas import top_n_por_municipio
+
+    dep = ctx.deputados()
+    cargos = rel.get('cargos', ctx.config['tabelas'][rel['tabela']]['cargos'])
+    top = pd.concat([
+        top_n_por_municipio(dep[dep['CD_CARGO'] == c], ctx.indice, cargo=c, n=rel['n'],
+                            genero=rel.get('genero'), ano=ctx.config['ano'],
+                            turno=ctx.config['turno_deputados'])
+        for c in cargos
+    ], ignore_index=True)
+    tabela = ctx.tabela(rel['tabela'])
+    top = top.merge(tabela[['SG_UF', 'CD_MUNICIPIO', 'NM_MUNICIPIO', 'perc_lula', 'grupo_lula']],
+                    on=['SG_UF', 'CD_MUNICIPIO'], how='left')
+    top = top.sort_values(['SG_UF', 'CD_MUNICIPIO', 'CD_CARGO', 'posicao'])
+    salvar_tabela(top, _caminho(ctx.config, rel['arquivo']))
+    print(f"   {rel['arquivo']}: {len(top)} linhas")
+    return top
+
+
+def relatorio_espacial(ctx, rel):
+    vizinhanca = rel['vizinhanca']
+    if not os.path.isabs(vizinhanca):
+        vizinhanca = os.path.join(ctx.config['dados'], vizinhanca)
+    if not os.path.exists(vizinhanca):
+        print(f"   Arquivo de vizinhança não encontrado ({vizinhanca}); análise espacial ignorada")
+        return None
+    from espacial import analise_espacial
+
+    df, moran = analise_espacial(ctx.tabela(rel['tabela']), vizinhanca)
+    salvar_tabela(df, _caminho(ctx.config, rel['arquivo']))
+    moran.to_csv(_caminho(ctx.config, rel.get('arquivo_moran', 'moran_global.csv')), index=False)
+    print("\n" + moran.to_string(index=False))
+    return df
+
+
+RELATORIOS = {
+    'grupos_csv': relatorio_grupos_csv,
+    'estatisticas_descritivas': relatorio_estatisticas_descritivas,
+    'tabela_municipal': relatorio_tabela_municipal,
+    'testes_grupos': relatorio_testes_grupos,
+    'top_candidatas': relatorio_top_candidatas,
+    'espacial': relatorio_espacial,
+}
+
+
+def executar(config):
+    validar_config(config)
+    plano = planejar(config)
+    print(f"   Plano: 1 leitura de {os.path.basename(plano['presidente'])} + "
+          f"{len(plano['arquivos_uf'])} arquivos de UF (cargos {plano['cargos_deputados']}), "
+          f"tabelas {plano['tabelas']}, {len(config['relatorios'])} relatórios")
+
+    os.makedirs(config['saida'], exist_ok=True)
+    ctx = Contexto(config, plano)
+    for i, rel in enumerate(config['relatorios'], 1):
+        print(f"\n[{i}/{len(config['relatorios'])}] {rel['tipo']} ({rel.get('tabela', '-')})")
+        RELATORIOS[rel['tipo']](ctx, rel)
+    if 'progresso' in ctx._cache:
+        ctx.progresso.fechar()
+    return ctx
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pipeline configurável Lula x deputadas')
+    parser.add_argument('config', nargs='?', help='arquivo JSON mesclado sobre a configuração padrão')
+    parser.add_argument('--motor', choices=MOTORES)
+    parser.add_argument('--saida')
+    parser.add_argument('--plano', action='store_true', help='só mostra o plano de leitura')
+    parser.add_argument('--progresso-intervalo', type=float,
+                        help='segundos entre relatos de progresso')
+    parser.add_argument('--status-json', help='arquivo JSON de status atualizado junto com o progresso')
+    args = parser.parse_args()
+
+    config = carregar_config(args.config)
+    if args.motor:
+        config['motor'] = args.motor
+    if args.saida:
+        config['saida'] = args.saida
+    if args.progresso_intervalo is not None:
+        config['progresso']['intervalo'] = args.progresso_intervalo
+    if args.status_json:
+        config['progresso']['status_json'] = args.status_json
+
+    print("=" * 80)
+    print("PIPELINE: LULA E VOTAÇÃO EM DEPUTADAS POR MUNICÍPIO")
+    print("=" * 80)
+
+    if args.plano:
+        print(json.dumps(planejar(config), indent=1, ensure_ascii=False))
+        return
+    executar(config)
+
+    print("\n" + "=" * 80)
+    print("PIPELINE CONCLUÍDO!")
+    print("=" * 80)
+
+
+if __name__ == '__main__':
+    main()
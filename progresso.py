@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Progresso, vazão e ETA das leituras, por arquivo/UF e no total.
+
+O avanço é medido em bytes consumidos de cada arquivo (o total é conhecido de
+antemão pelo tamanho em disco) e em linhas por chunk. A cada `intervalo`
+segundos é impressa uma linha com %, MB/s, linhas/s e ETA da UF em andamento e
+do total e, se pedido, o mesmo conteúdo é gravado num JSON de status (de forma
+atômica) que o agendador pode consultar.
+
+Com processos paralelos, os trabalhadores recebem um NotificadorFila (picklável)
+que envia os avanços por uma fila; uma thread no processo principal consome a
+fila e atualiza o Progresso.
+
+    progresso = Progresso({'SP': os.path.getsize(arq_sp)}, arquivo_status='status.json')
+    for chunk in ler_csv(arq_sp, ..., ao_ler=progresso.notificador('SP')):
+        ...
+    progresso.concluir('SP')
+    progresso.fechar()
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+
+INTERVALO_PADRAO = 10.0
+
+
+def _formatar_tempo(segundos):
+    if segundos is None:
+        return '--'
+    segundos = int(segundos)
+    h, resto = divmod(segundos, 3600)
+    m, s = divmod(resto, 60)
+    return f"{h}h{m:02d}m{s:02d}s" if h else f"{m}m{s:02d}s"
+
+
+def _formatar_linhas(por_segundo):
+    if por_segundo >= 1e6:
+        return f"{por_segundo / 1e6:.1f}M"
+    if por_segundo >= 1e3:
+        return f"{por_segundo / 1e3:.0f}k"
+    return f"{por_segundo:.0f}"
+
+
+class _Contador:
+
+    def __init__(self, total):
+        self.total = total
+        self.bytes = 0
+        self.linhas = 0
+        self.inicio = None
+        self.fim = None
+
+    def metricas(self, agora):
+        if self.inicio is None:
+            return {'bytes': 0, 'bytes_total': self.total, 'linhas': 0, 'fracao': 0.0,
+                    'mb_s': 0.0, 'linhas_s': 0.0, 'decorrido_s': 0.0, 'eta_s': None,
+                    'concluido': False}
+        decorrido = max((self.fim or agora) - self.inicio, 1e-9)
+        taxa = self.bytes / decorrido
+        restante = max(self.total - self.bytes, 0)
+        return {
+            'bytes': self.bytes,
+            'bytes_total': self.total,
+            'linhas': self.linhas,
+            'fracao': min(self.bytes / self.total, 1.0) if self.total else 1.0,
+            'mb_s': taxa / 1024 ** 2,
+            'linhas_s': self.linhas / decorrido,
+            'decorrido_s': decorrido,
+            'eta_s': 0.0 if self.fim else (restante / taxa if taxa > 0 else None),
+            'concluido': self.fim is not None,
+        }
+
+
+class Progresso:
+    """Acumula bytes/linhas por rótulo (UF ou arquivo) e relata periodicamente."""
+
+    def __init__(self, tamanhos, intervalo=INTERVALO_PADRAO, arquivo_status=None,
+                 saida=sys.stdout, nome='leitura'):
+        self.nome = nome
+        self.intervalo = intervalo
+        self.arquivo_status = arquivo_status
+        self.saida = saida
+        self.contadores = {r: _Contador(t) for r, t in tamanhos.items()}
+        self.total = sum(tamanhos.values())
+        self.inicio = time.time()
+        self._ultimo_relato = self.inicio
+        self._trava = threading.Lock()
+        self._consumidor = None
+
+    # ------------------------------------------------------------------
+    # Atualização
+    # ------------------------------------------------------------------
+    def avancar(self, rotulo, bytes_=0, linhas=0):
+        with self._trava:
+            c = self.contadores.setdefault(rotulo, _Contador(0))
+            if c.inicio is None:
+                c.inicio = time.time()
+            c.bytes += bytes_
+            c.linhas += linhas
+            # Rótulos com vários pedaços (shards) concluem ao atingir o total
+            if c.total and c.bytes >= c.total and c.fim is None:
+                c.fim = time.time()
+        self.relatar()
+
+    def concluir(self, rotulo):
+        with self._trava:
+            c = self.contadores.setdefault(rotulo, _Contador(0))
+            if c.inicio is None:
+                c.inicio = time.time()
+            c.fim = time.time()
+        self._gravar_status()
+
+    def notificador(self, rotulo):
+        """Callable (bytes, linhas) para o leitor, no mesmo processo."""
+        return lambda bytes_, linhas: self.avancar(rotulo, bytes_, linhas)
+
+    # ------------------------------------------------------------------
+    # Métricas e relatórios
+    # ------------------------------------------------------------------
+    def instantaneo(self):
+        agora = time.time()
+        with self._trava:
+            arquivos = {r: c.metricas(agora) for r, c in self.contadores.items()}
+            concluido = all(c.fim or not c.total for c in self.contadores.values())
+            if concluido:
+                agora = max([c.fim for c in self.contadores.values() if c.fim], default=agora)
+        feitos = sum(m['bytes'] for m in arquivos.values())
+        linhas = sum(m['linhas'] for m in arquivos.values())
+        decorrido = max(agora - self.inicio, 1e-9)
+        taxa = feitos / decorrido
+        return {
+            'nome': self.nome,
+            'pid': os.getpid(),
+            'atualizado_em': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'geral': {
+                'bytes': feitos,
+                'bytes_total': self.total,
+                'linhas': linhas,
+                'fracao': min(feitos / self.total, 1.0) if self.total else 1.0,
+                'mb_s': taxa / 1024 ** 2,
+                'linhas_s': linhas / decorrido,
+                'decorrido_s': decorrido,
+                'eta_s': 0.0 if concluido else (
+                    max(self.total - feitos, 0) / taxa if taxa > 0 else None),
+                'concluido': concluido,
+            },
+            'arquivos': arquivos,
+        }
+
+    def relatar(self, forcar=False):
+        agora = time.time()
+        if not forcar and agora - self._ultimo_relato < self.intervalo:
+            return
+        self._ultimo_relato = agora
+        estado = self.instantaneo()
+        g = estado['geral']
+        em_andamento = [(r, m) for r, m in estado['arquivos'].items()
+                        if m['bytes'] and not m['concluido']]
+        partes = [f"{r} {m['fracao'] * 100:5.1f}% {m['mb_s']:6.1f} MB/s "
+                  f"{_formatar_linhas(m['linhas_s'])} linhas/s ETA {_formatar_tempo(m['eta_s'])}"
+                  for r, m in em_andamento]
+        partes.append(f"total {g['fracao'] * 100:5.1f}% {g['mb_s']:6.1f} MB/s "
+                      f"{_formatar_linhas(g['linhas_s'])} linhas/s ETA {_formatar_tempo(g['eta_s'])}")
+        print("      [progresso] " + " | ".join(partes), file=self.saida, flush=True)
+        self._gravar_status(estado)
+
+    def resumo(self, rotulo):
+        m = self.instantaneo()['arquivos'][rotulo]
+        return (f"{m['bytes'] / 1024 ** 2:.1f} MB em {_formatar_tempo(m['decorrido_s'])} "
+                f"({m['mb_s']:.1f} MB/s, {_formatar_linhas(m['linhas_s'])} linhas/s)")
+
+    def _gravar_status(self, estado=None):
+        if not self.arquivo_status:
+            return
+        estado = estado or self.instantaneo()
+        tmp = f"{self.arquivo_status}.tmp.{os.getpid()}"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(estado, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, self.arquivo_status)
+
+    # ------------------------------------------------------------------
+    # Processos paralelos
+    # ------------------------------------------------------------------
+    def iniciar_fila(self, gerenciador):
+        """Cria a fila de avanços e a thread que a consome. Devolve a fila."""
+        fila = gerenciador.Queue()
+
+        def consumir():
+            while True:
+                msg = fila.get()
+                if msg is None:
+                    break
+                self.avancar(*msg)
+
+        self._consumidor = (fila, threading.Thread(target=consumir, daemon=True))
+        self._consumidor[1].start()
+        return fila
+
+    def fechar(self):
+        if self._consumidor is not None:
+            fila, thread = self._consumidor
+            fila.put(None)
+            thread.join()
+            self._consumidor = None
+        self.relatar(forcar=True)
+
+
+class NotificadorFila:
+    """Versão picklável de Progresso.notificador para processos trabalhadores."""
+
+    def __init__(self, fila, rotulo):
+        self.fila = fila
+        self.rotulo = rotulo
+
+    def __call__(self, bytes_, linhas):
+        self.fila.put((self.rotulo, bytes_, linhas))
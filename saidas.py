@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Gravação tipada das tabelas municipais.
+
+Além do CSV (mantido como está, com percentuais arredondados), cada tabela é
+gravada também como dataset Parquet particionado por SG_UF, com os percentuais
+em precisão total e as contagens brutas de votos. Consumidores podem ler só uma
+UF ou só algumas colunas:
+
+    pd.read_parquet('municipios_mais_50_lula.parquet',
+                    filters=[('SG_UF', '==', 'SP')],
+                    columns=['CD_MUNICIPIO', 'perc_lula'])
+
+O Parquet depende do pyarrow; se ele não estiver instalado apenas o CSV é
+gravado e um aviso é exibido.
+"""
+
+import os
+import shutil
+
+import numpy as np
+
+# Tipos das colunas conhecidas das tabelas municipais
+TIPOS_MUNICIPAIS = {
+    'SG_UF': 'string',
+    'CD_MUNICIPIO': 'int32',
+    'NM_MUNICIPIO': 'string',
+    'votos_lula': 'int64',
+    'votos_bolsonaro': 'int64',
+    'total_validos_pres': 'int64',
+    'votos_validos': 'int64',
+    'total_votos_dep_fed': 'int64',
+    'votos_mulheres_fed': 'int64',
+    'total_votos_dep_est': 'int64',
+    'votos_mulheres_est': 'int64',
+    'total_votos_deputados': 'int64',
+    'votos_mulheres_total': 'int64',
+    'num_eleitores': 'int64',
+    'total_votos_dep': 'int64',
+    'votos_em_mulheres': 'int64',
+    'perc_lula': 'float64',
+    'perc_votos_mulheres': 'float64',
+    'perc_votos_mulheres_fed': 'float64',
+    'perc_votos_mulheres_est': 'float64',
+    'perc_votos_mulheres_total': 'float64',
+}
+
+COMPRESSAO_PARQUET = 'zstd'
+
+
+def tipar_tabela_municipal(df):
+    df = df.copy()
+    for col, tipo in TIPOS_MUNICIPAIS.items():
+        if col in df.columns:
+            if tipo.startswith('int'):
+                df[col] = df[col].fillna(0).round().astype(tipo)
+            else:
+                df[col] = df[col].astype(tipo)
+    # Parquet exige nomes de coluna em texto (ex.: pivô presidencial 95/96)
+    df.columns = [str(c) for c in df.columns]
+    return df
+
+
+def pyarrow_disponivel():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def salvar_parquet_por_uf(df, destino, compressao=COMPRESSAO_PARQUET):
+    """Grava df como dataset Parquet particionado por SG_UF (substitui destino)."""
+    if os.path.isdir(destino):
+        shutil.rmtree(destino)
+    df = tipar_tabela_municipal(df)
+    df.to_parquet(
+        destino,
+        engine='pyarrow',
+        index=False,
+        compression=compressao,
+        partition_cols=['SG_UF'],
+    )
+    return destino
+
+
+def salvar_tabela(df_completo, arquivo_csv, colunas_csv=None, renomear=None,
+                  casas=2, encoding=None):
+    """
+    Grava o CSV de relatório (colunas_csv, percentuais arredondados em `casas`)
+    e, ao lado, o Parquet particionado com todas as colunas de df_completo.
+    """
+    df_csv = df_completo if colunas_csv is None else df_completo[colunas_csv]
+    if renomear:
+        df_csv = df_csv.rename(columns=renomear)
+    if casas is not None:
+        df_csv = df_csv.copy()
+        for col in df_csv.columns:
+            if str(col).startswith('perc_') and np.issubdtype(df_csv[col].dtype, np.floating):
+                df_csv[col] = df_csv[col].round(casas)
+    df_csv.to_csv(arquivo_csv, index=False, encoding=encoding)
+
+    destino_parquet = os.path.splitext(arquivo_csv)[0] + '.parquet'
+    if pyarrow_disponivel():
+        salvar_parquet_por_uf(df_completo, destino_parquet)
+    else:
+        print(f"   AVISO: pyarrow não instalado, {destino_parquet} não foi gerado")
+        destino_parquet = None
+    return df_csv, destino_parquet
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ranking das N candidaturas mais votadas em cada município.
+
+Para cada UF os votos agregados (município x número) viram uma matriz densa
+município x candidato; as N maiores de cada linha são obtidas com
+np.argpartition (seleção parcial, O(candidatos) por município) e só esses N
+valores são ordenados. Nomes, partido e situação vêm do índice de candidatos.
+"""
+
+import numpy as np
+import pandas as pd
+
+COLUNAS_TOP = [
+    'SG_UF', 'CD_MUNICIPIO', 'CD_CARGO', 'posicao', 'NR_CANDIDATO',
+    'NM_URNA_CANDIDATO', 'SG_PARTIDO', 'DS_GENERO', 'eleito',
+    'QT_VOTOS', 'perc_votos_municipio'
+]
+
+# Tipos das colunas, usados também quando nenhuma candidatura é encontrada
+TIPOS_TOP = {
+    'SG_UF': object, 'CD_MUNICIPIO': 'int32', 'CD_CARGO': 'int64', 'posicao': 'int64',
+    'NR_CANDIDATO': 'int64', 'NM_URNA_CANDIDATO': object, 'SG_PARTIDO': object,
+    'DS_GENERO': object, 'eleito': bool, 'QT_VOTOS': 'int64', 'perc_votos_municipio': 'float64',
+}
+
+
+def _top_n_matriz(matriz, n):
+    """Colunas e valores das n maiores entradas de cada linha, em ordem decrescente."""
+    k = min(n, matriz.shape[1])
+    if k == 0:
+        vazio = np.empty((matriz.shape[0], 0), dtype=np.int64)
+        return vazio, vazio
+    if k < matriz.shape[1]:
+        cols = np.argpartition(-matriz, k - 1, axis=1)[:, :k]
+    else:
+        cols = np.broadcast_to(np.arange(k), (matriz.shape[0], k))
+    vals = np.take_along_axis(matriz, cols, axis=1)
+    ordem = np.argsort(-vals, axis=1, kind='stable')
+    return np.take_along_axis(cols, ordem, axis=1), np.take_along_axis(vals, ordem, axis=1)
+
+
+def _posicoes(linhas):
+    """Posição (1..N) de cada entrada dentro do seu município (linhas já agrupadas)."""
+    inicio = np.flatnonzero(np.r_[True, linhas[1:] != linhas[:-1]])
+    tamanhos = np.diff(np.r_[inicio, len(linhas)])
+    return np.arange(len(linhas)) - np.repeat(inicio, tamanhos) + 1
+
+
+def top_n_por_municipio(votos, indice, cargo, n=5, genero='FEMININO', ano=2022, turno=1):
+    """
+    votos: DataFrame com SG_UF, CD_MUNICIPIO, NR_VOTAVEL e QT_VOTOS de um cargo.
+    genero: texto de DS_GENERO a manter ('FEMININO', 'MASCULINO') ou None para todos.
+
+    O percentual é calculado sobre o total de votos do cargo no município
+    (inclusive legenda e candidaturas de outro gênero).
+    """
+    resultados = []
+    total_mun = votos.groupby('CD_MUNICIPIO')['QT_VOTOS'].sum()
+
+    for uf, votos_uf in votos.groupby('SG_UF', sort=True):
+        pos = indice.localizar(ano, votos_uf['SG_UF'].to_numpy(), cargo, turno,
+                               votos_uf['NR_VOTAVEL'].to_numpy())
+        manter = pos >= 0
+        if genero is not None:
+            if genero not in indice.dicionarios['genero']:
+                continue
+            manter &= indice.atributo('genero', pos) == indice.codigo('genero', genero)
+        if not manter.any():
+            continue
+
+        pos = pos[manter]
+        qt = votos_uf['QT_VOTOS'].to_numpy()[manter].astype(np.int64)
+        mun_i, municipios = pd.factorize(votos_uf['CD_MUNICIPIO'].to_numpy()[manter])
+        cand_i, candidatos = pd.factorize(pos)
+
+        matriz = np.zeros((len(municipios), len(candidatos)), dtype=np.int64)
+        np.add.at(matriz, (mun_i, cand_i), qt)
+
+        cols, vals = _top_n_matriz(matriz, n)
+        linhas = np.repeat(np.arange(len(municipios)), cols.shape[1])
+        cols = cols.ravel()
+        vals = vals.ravel()
+        validos = vals > 0
+        linhas, cols, vals = linhas[validos], cols[validos], vals[validos]
+
+        pos_top = candidatos[cols]
+        campos = indice.campos_chave(pos_top)
+        mun_top = municipios[linhas]
+        resultados.append(pd.DataFrame({
+            'SG_UF': uf,
+            'CD_MUNICIPIO': mun_top,
+            'CD_CARGO': cargo,
+            'posicao': _posicoes(linhas),
+            'NR_CANDIDATO': campos['NR_CANDIDATO'],
+            'NM_URNA_CANDIDATO': indice.decodificar('nome', indice.atributo('nome', pos_top)),
+            'SG_PARTIDO': indice.decodificar('partido', indice.atributo('partido', pos_top)),
+            'DS_GENERO': indice.decodificar('genero', indice.atributo('genero', pos_top)),
+            'eleito': indice.eleito(pos_top),
+            'QT_VOTOS': vals,
+            'perc_votos_municipio': vals / total_mun.reindex(mun_top).to_numpy() * 100,
+        }))
+
+    if not resultados:
+        return pd.DataFrame({c: pd.Series(dtype=TIPOS_TOP[c]) for c in COLUNAS_TOP})
+    return pd.concat(resultados, ignore_index=True)[COLUNAS_TOP]
+